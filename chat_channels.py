@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+import frame_analysis
+from chat_messages import SYSTEM_PREFIX_RE, Colour
+
+# Channel of a message that neither its colour nor its text gives away.
+UNKNOWN = "unknown"
+# Default WoW chat colours and the channels drawn in each. The numbered channels
+# (General, Trade, LocalDefense...) share one colour, so only their tag tells them
+# apart; "channel" is a numbered channel whose tag could not be read.
+DEFAULT_PALETTE: Tuple[Tuple[Colour, Tuple[str, ...]], ...] = (
+    ((255, 255, 255), ("say",)),
+    ((255, 64, 64), ("yell",)),
+    ((255, 128, 64), ("emote",)),
+    ((255, 128, 255), ("whisper",)),
+    ((0, 255, 246), ("whisper",)),
+    ((170, 170, 255), ("party",)),
+    ((118, 200, 255), ("party",)),
+    ((255, 127, 0), ("raid", "instance")),
+    ((255, 72, 9), ("raid", "instance", "raid_warning")),
+    ((64, 255, 64), ("guild",)),
+    ((64, 192, 64), ("officer",)),
+    ((255, 255, 0), ("system",)),
+    ((255, 192, 192), ("channel", "general", "trade", "localdefense", "lfg", "world")),
+)
+# A measured colour farther than this (RGB distance) from every palette colour is unknown.
+MAX_COLOUR_DISTANCE = 80.0
+# Fewest glyph pixels a line needs for its colour to be measured.
+MIN_INK_PIXELS = 12
+
+# Tag names as shown in the chat frame, lower case without spaces, in English and Chinese clients.
+CHANNEL_ALIASES: Dict[str, str] = {
+    "general": "general",
+    "综合": "general",
+    "trade": "trade",
+    "交易": "trade",
+    "localdefense": "localdefense",
+    "本地防务": "localdefense",
+    "lookingforgroup": "lfg",
+    "lfg": "lfg",
+    "寻求组队": "lfg",
+    "world": "world",
+    "世界": "world",
+    "guild": "guild",
+    "公会": "guild",
+    "officer": "officer",
+    "官员": "officer",
+    "party": "party",
+    "partyleader": "party",
+    "队伍": "party",
+    "小队": "party",
+    "队长": "party",
+    "raid": "raid",
+    "raidleader": "raid",
+    "团队": "raid",
+    "团队领袖": "raid",
+    "raidwarning": "raid_warning",
+    "团队通知": "raid_warning",
+    "instance": "instance",
+    "instanceleader": "instance",
+    "副本": "instance",
+    "副本向导": "instance",
+}
+_TAG_RE = re.compile(r"^\[\s*(?:(\d{1,2})\s*\.\s*)?([^\]]+?)\s*\]")
+_SPEECH_RE = re.compile(
+    r"^(?:\[[^\]]+\]|[^\s\[\]:：]{2,24})\s*(says|yells|whispers|悄悄地说|大喊|说)\s*[:：]",
+    re.IGNORECASE,
+)
+_SPEECH_CHANNELS = {"says": "say", "说": "say", "yells": "yell", "大喊": "yell", "whispers": "whisper", "悄悄地说": "whisper"}
+_WHISPER_TO_RE = re.compile(r"^(?:to|发送给)\s*\[[^\]]+\]\s*[:：]", re.IGNORECASE)
+_NAME_DROP_RE = re.compile(r"[\s_\-]+")
+
+
+def canonical_channel(name: str) -> str:
+    """Settings spelling of a channel: "LocalDefense", "Raid Warning" and "本地防务" all work."""
+    key = _NAME_DROP_RE.sub("", name.strip().casefold())
+    return CHANNEL_ALIASES.get(key, key)
+
+
+def channel_from_text(text: str) -> Optional[str]:
+    """Channel named by a message's leading tag or speech verb, or None."""
+    stripped = text.strip()
+    tag = _TAG_RE.match(stripped)
+    if tag:
+        channel = CHANNEL_ALIASES.get(_NAME_DROP_RE.sub("", tag.group(2).casefold()))
+        if channel:
+            return channel
+        if tag.group(1):
+            return "channel"
+    speech = _SPEECH_RE.match(stripped)
+    if speech:
+        return _SPEECH_CHANNELS[speech.group(1).casefold()]
+    if _WHISPER_TO_RE.match(stripped):
+        return "whisper"
+    if SYSTEM_PREFIX_RE.match(stripped):
+        return "system"
+    return None
+
+
+def line_colour(pixels: np.ndarray, contrast: int = 60) -> Optional[Colour]:
+    """Text colour of a BGR(A) line crop: the median of its brightest glyph pixels.
+
+    Only the brightest quarter is used so anti-aliased edges and the background
+    showing through them do not pull the colour towards grey. Returns None when
+    the crop holds too little ink.
+    """
+    mask = frame_analysis.text_mask(pixels, contrast)
+    if int(mask.sum()) < MIN_INK_PIXELS:
+        return None
+    ink = pixels[..., :3][mask].astype(np.int16)
+    peak = ink.max(axis=1)
+    core = ink[peak >= np.percentile(peak, 75)]
+    blue, green, red = np.median(core, axis=0)
+    return int(red), int(green), int(blue)
+
+
+class ChannelFilter:
+    """Sort chat lines into channels and decide which ones get translated (``ocr.channels``).
+
+    A message's channel comes from its colour first; when the colour is shared
+    by several channels, or could not be measured, its leading tag decides,
+    e.g. ``[2. Trade]``, ``[Guild]`` or ``... says:``. Channels in ``deny`` are
+    dropped, and with a non-empty ``allow`` so is every channel not listed.
+    Messages of unknown channel are always kept.
+
+    ``skips_colour`` tells from colour alone whether a line can be dropped before
+    recognition: only when every channel drawn in that colour is filtered out.
+    """
+
+    def __init__(
+        self,
+        allow: Sequence[str] = (),
+        deny: Sequence[str] = (),
+        colours: Optional[Mapping[str, Sequence[int]]] = None,
+    ) -> None:
+        self.allow: FrozenSet[str] = frozenset(canonical_channel(name) for name in allow)
+        self.deny: FrozenSet[str] = frozenset(canonical_channel(name) for name in deny)
+        palette: List[Tuple[Colour, Tuple[str, ...]]] = list(DEFAULT_PALETTE)
+        for name, value in (colours or {}).items():
+            # A custom colour moves the channel out of its default family.
+            channel = canonical_channel(name)
+            colour = (int(value[0]), int(value[1]), int(value[2]))
+            palette = [
+                (rgb, tuple(item for item in family if item != channel))
+                for rgb, family in palette
+            ]
+            palette = [entry for entry in palette if entry[1]]
+            palette.insert(0, (colour, (channel,)))
+        self._palette = palette
+        self._rgb = np.asarray([rgb for rgb, _ in palette], dtype=np.float32)
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Mapping[str, Any]]) -> Optional["ChannelFilter"]:
+        """Build the filter described by ``ocr.channels``, or None when it filters nothing."""
+        if not isinstance(cfg, Mapping):
+            return None
+        allow = cfg.get("allow") or []
+        deny = cfg.get("deny") or []
+        if not allow and not deny:
+            return None
+        colours = cfg.get("colours")
+        return cls(
+            [str(name) for name in allow],
+            [str(name) for name in deny],
+            colours if isinstance(colours, Mapping) else None,
+        )
+
+    def family(self, colour: Optional[Colour]) -> Optional[Tuple[str, ...]]:
+        """Channels drawn in the palette colour nearest to ``colour``, or None if none is near."""
+        if colour is None:
+            return None
+        distances = np.linalg.norm(self._rgb - np.asarray(colour, dtype=np.float32), axis=1)
+        nearest = int(distances.argmin())
+        if distances[nearest] > MAX_COLOUR_DISTANCE:
+            return None
+        return self._palette[nearest][1]
+
+    def classify(self, text: str, colour: Optional[Colour] = None) -> str:
+        family = self.family(colour)
+        tagged = channel_from_text(text)
+        if family is None:
+            return tagged or UNKNOWN
+        if tagged in family:
+            return tagged
+        return family[0]
+
+    def allows(self, channel: str) -> bool:
+        if channel == UNKNOWN:
+            return True
+        if channel in self.deny:
+            return False
+        return not self.allow or channel in self.allow
+
+    def skips_colour(self, colour: Optional[Colour]) -> bool:
+        family = self.family(colour)
+        return family is not None and not any(self.allows(channel) for channel in family)
@@ -0,0 +1,414 @@
+from __future__ import annotations
+
+import difflib
+import hashlib
+import re
+import statistics
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# Characters that survive into a message's identity key; everything else is OCR noise.
+_KEY_DROP_RE = re.compile(r"[^0-9a-z\u4e00-\u9fff]+")
+_DIGITS_RE = re.compile(r"\D+")
+# Leading channel/player tags or a "name:" prefix.
+_HEADER_RE = re.compile(r"^(?:\s*\[[^\]]*\]?)+\s*[:：]?|^[^\s\[\]<>]{2,24}[:：]")
+_OPEN_PUNCT = ("(", "[", "{", "\uFF08", "\u3010", "\u300A")
+_CLOSE_PUNCT = (")", "]", "}", "\uFF09", "\u3011", "\u300B")
+CHANNEL_NAMES = (
+    "general",
+    "trade",
+    "localdefense",
+    "lookingforgroup",
+    "lfg",
+    "world",
+    "guild",
+    "party",
+    "raid",
+    "officer",
+    "instance",
+    "bg",
+    "arena",
+    "综合",
+    "交易",
+    "公会",
+    "队伍",
+    "团队",
+    "本地防务",
+    "系统",
+)
+SYSTEM_PREFIXES = (
+    "you are now",
+    "你获得",
+    "你拾取",
+    "你失去",
+    "你学会",
+    "任务",
+    "系统",
+    "声望",
+    "成就",
+)
+CHANNEL_PATTERN = "|".join(re.escape(name) for name in CHANNEL_NAMES)
+SYSTEM_PREFIX_PATTERN = "|".join(re.escape(prefix) for prefix in SYSTEM_PREFIXES)
+CHANNEL_TAG_RE = re.compile(
+    rf"^\[\s*(\d{{1,2}}\.\s*)?(?:{CHANNEL_PATTERN})\b",
+    re.IGNORECASE,
+)
+PLAYER_TAG_RE = re.compile(r"^\[[^\]]+\]\s*[^:：]{0,32}[:：]", re.IGNORECASE)
+SYSTEM_PREFIX_RE = re.compile(
+    rf"^(you(?:'ve)?\s+(?:receive|received|loot|gain|lose|learn|create|roll)|{SYSTEM_PREFIX_PATTERN})",
+    re.IGNORECASE,
+)
+NAME_COLON_RE = re.compile(r'^[^\s\[\]<>]{2,24}[:：]')
+# A line that holds nothing but one bracketed tag, e.g. a channel tag the detector split off.
+_LONE_TAG_RE = re.compile(r"^\[[^\]]*\]?$")
+
+# Boxes whose vertical overlap is at least this share of the shorter one sit on the same line.
+LINE_OVERLAP = 0.5
+# A line starting this many line heights right of its message's first line is a wrapped continuation.
+INDENT_RATIO = 0.6
+# A vertical step of more than this many line pitches means lines in between are missing.
+GAP_RATIO = 1.6
+# Two messages are one read differently when their keys differ by at most one misread
+# character per this many characters of message body (the text after the channel
+# and player tags) and carry the same digits, so "pull in 3" never takes the
+# translation of "pull in 4".
+MATCH_SPAN = 8
+# Shortest key matched as the visible tail of a longer known message: a message
+# scrolling out at the top of the chat box loses its first lines.
+MIN_FRAGMENT = 12
+
+Box = Tuple[float, float, float, float]
+# An (r, g, b) text colour.
+Colour = Tuple[int, int, int]
+
+
+@dataclass
+class OcrSegment:
+    """One recognised text box in region pixel coordinates, with its text colour if measured."""
+
+    box: Box
+    text: str
+    score: float
+    colour: Optional[Colour] = None
+
+    @property
+    def center_y(self) -> float:
+        return (self.box[1] + self.box[3]) / 2.0
+
+    def shifted(self, dy: float) -> "OcrSegment":
+        x0, y0, x1, y1 = self.box
+        return OcrSegment((x0, y0 - dy, x1, y1 - dy), self.text, self.score, self.colour)
+
+
+@dataclass
+class ChatLine:
+    """The segments of one visual line, joined left to right, coloured like its longest segment."""
+
+    box: Box
+    text: str
+    colour: Optional[Colour] = None
+
+
+@dataclass
+class ChatMessage:
+    """One chat message rebuilt from one or more wrapped lines.
+
+    ``id`` depends only on the message text with case, spacing and punctuation
+    dropped, so it stays the same while the message scrolls up the chat box and
+    across small OCR differences between frames. Repeats of the same text within
+    one frame get ``#2``, ``#3``... appended, counted from the top. ``colour`` is
+    that of the first line.
+    """
+
+    id: str
+    text: str
+    box: Box
+    lines: int = 1
+    colour: Optional[Colour] = None
+
+
+def normalize_segment(raw: str) -> str:
+    if not raw:
+        return ""
+    s = raw.replace("\u3000", " ").strip()
+    if not s:
+        return ""
+    s = _WHITESPACE_RE.sub(" ", s)
+    for punct in _CLOSE_PUNCT:
+        s = s.replace(f" {punct}", punct)
+    for punct in _OPEN_PUNCT:
+        s = s.replace(f"{punct} ", punct)
+    for mark in (",", ".", ";", ":", "!", "?", "\uFF0C", "\u3002", "\uFF1B", "\uFF1A", "\uFF01", "\uFF1F", "\u3001"):
+        s = s.replace(f" {mark}", mark)
+    return s.strip()
+
+
+def _is_wide(ch: str) -> bool:
+    return "\u4e00" <= ch <= "\u9fff" or "\u3000" <= ch <= "\u303f" or "\uff00" <= ch <= "\uffef"
+
+
+def join_text(parts: Sequence[str]) -> str:
+    """Join line or segment texts, without a space where CJK text meets."""
+    joined = ""
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        if joined and not (_is_wide(joined[-1]) or _is_wide(part[0])):
+            joined += " "
+        joined += part
+    return normalize_segment(joined)
+
+
+def strip_channel_prefix(text: str) -> str:
+    stripped = text.lstrip()
+    if not stripped.startswith("["):
+        return stripped
+    closing = stripped.find("]")
+    if closing <= 0:
+        return stripped
+    return stripped[closing + 1 :].lstrip()
+
+
+def is_new_message(text: str) -> bool:
+    stripped = text.strip()
+    if not stripped:
+        return False
+    if CHANNEL_TAG_RE.match(stripped):
+        return True
+    if PLAYER_TAG_RE.match(stripped):
+        return True
+    if SYSTEM_PREFIX_RE.match(stripped):
+        return True
+    if NAME_COLON_RE.match(stripped):
+        return True
+    return False
+
+
+def message_key(text: str) -> str:
+    """The part of a message's text that identifies it: lower-case letters, digits and CJK."""
+    return _KEY_DROP_RE.sub("", text.casefold())
+
+
+def message_id(text: str) -> str:
+    return hashlib.blake2b(message_key(text).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def group_lines(segments: Sequence[OcrSegment]) -> List[ChatLine]:
+    """Group segments into visual lines by vertical overlap, top to bottom."""
+    rows: List[Tuple[float, float, List[OcrSegment]]] = []
+    for segment in sorted(segments, key=lambda item: (item.center_y, item.box[0])):
+        x0, y0, x1, y1 = segment.box
+        if rows:
+            top, bottom, members = rows[-1]
+            overlap = min(bottom, y1) - max(top, y0)
+            if overlap >= LINE_OVERLAP * max(min(bottom - top, y1 - y0), 1.0):
+                members.append(segment)
+                rows[-1] = (min(top, y0), max(bottom, y1), members)
+                continue
+        rows.append((y0, y1, [segment]))
+
+    lines: List[ChatLine] = []
+    for top, bottom, members in rows:
+        members.sort(key=lambda item: item.box[0])
+        text = join_text([member.text for member in members])
+        if not text:
+            continue
+        left = min(member.box[0] for member in members)
+        right = max(member.box[2] for member in members)
+        colour = max(members, key=lambda member: len(member.text)).colour
+        lines.append(ChatLine((left, top, right, bottom), text, colour))
+    return lines
+
+
+def _line_pitch(lines: Sequence[ChatLine]) -> Tuple[float, float]:
+    """Typical text height and the top-to-top distance of adjacent lines."""
+    height = statistics.median(line.box[3] - line.box[1] for line in lines)
+    steps = [
+        following.box[1] - line.box[1]
+        for line, following in zip(lines, lines[1:])
+        if 0 < following.box[1] - line.box[1] < 2.5 * height
+    ]
+    pitch = min(steps) if steps else height * 1.3
+    return max(height, 1.0), max(pitch, height, 1.0)
+
+
+class MessageAssembler:
+    """Rebuild chat messages from recognised segments using their boxes.
+
+    Segments on the same visual line are joined left to right, so split-off tags
+    and brackets rejoin their line. Lines are then grouped into messages: a line
+    more than ``INDENT_RATIO`` line heights right of the leftmost line is a
+    wrapped continuation of the message above, as long as no lines are missing
+    in between. Once such a hanging indent has been seen, the chat frame is known
+    to indent wrapped lines and every unindented line starts a message. Before
+    that, an unindented line starts a message only when it begins with a
+    channel, player or system prefix. Indentation always wins over the prefix,
+    so a wrapped line that happens to start with ``[Item]:`` stays put.
+
+    Keep one assembler per chat region.
+    """
+
+    def __init__(self) -> None:
+        self.hanging_indent = False
+
+    def __call__(self, segments: Sequence[OcrSegment]) -> List[ChatMessage]:
+        lines = group_lines(segments)
+        if not lines:
+            return []
+        height, pitch = _line_pitch(lines)
+        margin = min(line.box[0] for line in lines) + INDENT_RATIO * height
+        indented = [line.box[0] > margin for line in lines]
+        if any(indented[1:]):
+            self.hanging_indent = True
+
+        groups: List[List[ChatLine]] = []
+        for line, wrapped in zip(lines, indented):
+            if groups:
+                current = groups[-1]
+                adjacent = line.box[1] - current[-1].box[1] <= GAP_RATIO * pitch
+                continues = (
+                    wrapped
+                    or (len(current) == 1 and _LONE_TAG_RE.match(current[0].text) is not None)
+                    or (not self.hanging_indent and not is_new_message(line.text))
+                )
+                if adjacent and continues:
+                    current.append(line)
+                    continue
+            groups.append([line])
+
+        messages: List[ChatMessage] = []
+        seen: Dict[str, int] = {}
+        for group in groups:
+            text = join_text([line.text for line in group])
+            base = message_id(text)
+            seen[base] = seen.get(base, 0) + 1
+            ident = base if seen[base] == 1 else f"{base}#{seen[base]}"
+            box = (
+                min(line.box[0] for line in group),
+                group[0].box[1],
+                max(line.box[2] for line in group),
+                group[-1].box[3],
+            )
+            messages.append(ChatMessage(ident, text, box, len(group), group[0].colour))
+        return messages
+
+
+def _misread_allowance(text: str) -> int:
+    return len(message_key(_HEADER_RE.sub("", text))) // MATCH_SPAN
+
+
+def _same_message(key: str, other: str, allowed: int) -> bool:
+    if not allowed or abs(len(key) - len(other)) > allowed:
+        return False
+    if _DIGITS_RE.sub("", key) != _DIGITS_RE.sub("", other):
+        return False
+    # Characters of either key left unmatched; a misread character counts twice.
+    matcher = difflib.SequenceMatcher(None, key, other, autojunk=False)
+    total = len(key) + len(other)
+    if total * (1.0 - matcher.quick_ratio()) > 2 * allowed + 1e-9:
+        return False
+    return total * (1.0 - matcher.ratio()) <= 2 * allowed + 1e-9
+
+
+def match_messages(previous: Sequence[ChatMessage], current: Sequence[ChatMessage]) -> List[Optional[ChatMessage]]:
+    """For each current message, the previous-frame message it re-reads, or None if it is new.
+
+    Equal ids match first. The rest match a previous message whose key differs
+    by a few misread characters, see ``MATCH_SPAN``, or that contains the whole
+    key as a fragment. Each previous message is matched at most once.
+    """
+    by_id = {message.id: message for message in previous}
+    matches: List[Optional[ChatMessage]] = [by_id.get(message.id) for message in current]
+    used = {match.id for match in matches if match is not None}
+    candidates = [(message, message_key(message.text)) for message in previous if message.id not in used]
+    for index, message in enumerate(current):
+        if matches[index] is not None or not candidates:
+            continue
+        key = message_key(message.text)
+        allowed = _misread_allowance(message.text)
+        for position, (_, other) in enumerate(candidates):
+            if (len(key) >= MIN_FRAGMENT and key in other) or _same_message(key, other, allowed):
+                matches[index] = candidates.pop(position)[0]
+                break
+    return matches
+
+
+class RepeatTracker:
+    """Count how often each message was posted, for collapsing spam (``ocr.repeats``).
+
+    Messages are known by their fingerprint, the ``ChatMessage.id`` without the
+    ``#n`` suffix, so a repeat is a message with the same text after case,
+    spacing and punctuation are dropped. A fingerprint is forgotten ``window``
+    seconds after it was last on screen, and at most ``capacity`` are kept, the
+    least recently seen going first.
+    """
+
+    def __init__(self, window: float = 300.0, capacity: int = 512) -> None:
+        self.window = float(window)
+        self.capacity = max(int(capacity), 1)
+        # fingerprint -> (times posted, last seen), least recently seen first.
+        self._entries: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Mapping[str, Any]]) -> Optional["RepeatTracker"]:
+        """Build the tracker described by ``ocr.repeats``, or None when it is disabled."""
+        if not isinstance(cfg, Mapping) or not cfg.get("enabled", True):
+            return None
+        return cls(float(cfg.get("window", 300.0)), int(cfg.get("capacity", 512)))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def observe(self, fingerprint: str, now: float, posted: bool) -> int:
+        """Note a message on screen at ``now``; ``posted`` when it is a new post rather
+        than one already seen scrolling by. Returns how often it was posted."""
+        while self._entries:
+            oldest, (_, seen) = next(iter(self._entries.items()))
+            if now - seen <= self.window:
+                break
+            del self._entries[oldest]
+        count, _ = self._entries.pop(fingerprint, (0, now))
+        count = count + 1 if posted or not count else count
+        self._entries[fingerprint] = (count, now)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return count
+
+
+def fingerprint(message: ChatMessage) -> str:
+    return message.id.partition("#")[0]
+
+
+def new_posts(
+    previous: Sequence[ChatMessage],
+    current: Sequence[ChatMessage],
+    matches: Sequence[Optional[ChatMessage]],
+) -> List[bool]:
+    """For each current message, whether it was posted since the previous frame.
+
+    Chat only scrolls up, so the copies of one text are paired top to bottom
+    with the first unpaired copy of the previous frame at or below them; a copy
+    left over is new, e.g. an advert posted again while its old copy is still
+    on screen or has just scrolled away. A message ``match_messages`` paired
+    with a differently read previous message is not new either.
+    """
+    tops: Dict[str, List[float]] = {}
+    for message in previous:
+        tops.setdefault(fingerprint(message), []).append(message.box[1])
+    posted: List[bool] = []
+    for message, match in zip(current, matches):
+        key = fingerprint(message)
+        if match is not None and fingerprint(match) != key:
+            posted.append(False)
+            continue
+        earlier = tops.get(key, [])
+        tolerance = (message.box[3] - message.box[1]) / max(message.lines, 1) / 2
+        while earlier and earlier[0] < message.box[1] - tolerance:
+            earlier.pop(0)
+        posted.append(not earlier)
+        if earlier:
+            earlier.pop(0)
+    return posted
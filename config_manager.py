@@ -1,5 +1,6 @@
 ﻿from __future__ import annotations
 
+import copy
 import json
 import re
 from pathlib import Path
@@ -8,6 +9,10 @@ from typing import Any, Dict
 CONFIG_DIR = Path(__file__).resolve().parent / "config"
 SETTINGS_PATH = CONFIG_DIR / "settings.json"
 GLOSSARY_PATH = CONFIG_DIR / "wow_glossary.json"
+# Result of the ocr.backend = "auto" benchmark on this machine.
+OCR_BACKEND_PATH = CONFIG_DIR / "ocr_backend.json"
+# Glyph bitmaps learned by the experimental ocr.glyph_cache.
+GLYPH_TABLE_PATH = CONFIG_DIR / "glyph_table.json"
 
 DEFAULT_SETTINGS: Dict[str, Any] = {
     "custom_prompt": "你是一个专业的魔兽世界本地化翻译助手。这些文本来自游戏内聊天、组队和副本频道，常含职业缩写、装备名称与战术术语。原始 OCR 可能把同一条消息拆成多个片段，请结合上下文自动合并，并保持每条消息单独成行，优先保留频道与玩家信息。请结合魔兽世界背景和常见缩写做出自然、准确的中文翻译，保留关键专有名词。请直接输出译文，不要添加任何解释或额外内容。文本内容：{text}",
@@ -30,7 +35,32 @@ DEFAULT_SETTINGS: Dict[str, Any] = {
     },
     "ocr": {
         "detection_interval": 3500,
+        "debug_dump_frames": False,
+        "reuse_mode": "scroll",
+        "backend": "rapidocr",
+        "line_mode": "detect",
+        "detect_scale": 1.0,
+        "schedule": {"adaptive": True, "min_interval": 500, "max_interval": 8000, "backoff": 1.5, "speedup": 0.5},
+        "change_threshold": 0.003,
+        "preprocess": {"enabled": False, "contrast": 60, "binarize": True, "margin": 4},
+        "line_cache_size": 512,
+        "glyph_cache": {"enabled": False, "min_votes": 2, "learn_score": 0.95, "capacity": 8192},
+        "confidence": {"min_score": 0.6, "retry_below": 0.85, "retry_scale": 2.0},
+        "channels": {"allow": [], "deny": [], "colours": {}},
+        "repeats": {"enabled": True, "window": 300, "capacity": 512},
+        "worker": {"enabled": False, "slots": 2, "timeout": 30},
+        "engine": {
+            "use_cls": False,
+            "det_limit_type": "max",
+            "det_limit_side_len": 960,
+            "rec_batch_num": 6,
+            "intra_op_num_threads": -1,
+            "inter_op_num_threads": -1,
+            "det_model_path": "",
+            "rec_model_path": "",
+        },
         "region": {"x": 320, "y": 220, "width": 420, "height": 210},
+        "regions": [],
     },
     "panel": {
         "position": {"x": 240, "y": 180},
@@ -65,7 +95,7 @@ def ensure_config_dir() -> None:
 def load_json(path: Path, default: Any) -> Any:
     try:
         if path.exists():
-            with path.open("r", encoding="utf-8") as fh:
+            with path.open("r", encoding="utf-8-sig") as fh:
                 return json.load(fh)
     except json.JSONDecodeError:
         pass
@@ -185,9 +215,10 @@ class ConfigManager:
                 changed = True
 
         ocr_cfg = self.get_ocr_config()
-        if "detection_interval" not in ocr_cfg:
-            ocr_cfg["detection_interval"] = DEFAULT_SETTINGS["ocr"]["detection_interval"]
-            changed = True
+        for key, value in DEFAULT_SETTINGS["ocr"].items():
+            if key != "region" and key not in ocr_cfg:
+                ocr_cfg[key] = copy.deepcopy(value)
+                changed = True
         region = ocr_cfg.setdefault("region", {})
         if not isinstance(region, dict):
             region = {}
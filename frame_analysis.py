@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+Band = Tuple[int, int]
+Rect = Tuple[int, int, int, int]
+
+# Odd 64-bit multipliers for the per-row hash; one per pixel column, cycled as needed.
+_HASH_SEED = 0x9E3779B97F4A7C15
+_hash_weights: Optional[np.ndarray] = None
+
+
+def _weights(width: int) -> np.ndarray:
+    global _hash_weights
+    if _hash_weights is None or _hash_weights.size < width:
+        size = max(width, 1024 if _hash_weights is None else _hash_weights.size * 2)
+        rng = np.random.default_rng(_HASH_SEED)
+        _hash_weights = rng.integers(1, 2**63, size=size, dtype=np.uint64) | np.uint64(1)
+    return _hash_weights[:width]
+
+
+def row_hashes(pixels: np.ndarray) -> np.ndarray:
+    """Return one 64-bit hash per scanline of a BGRA frame, ignoring the alpha channel."""
+    height, width = pixels.shape[:2]
+    packed = np.ascontiguousarray(pixels).view(np.uint32).reshape(height, width)
+    colour = (packed & np.uint32(0x00FFFFFF)).astype(np.uint64)
+    with np.errstate(over="ignore"):
+        return (colour * _weights(width)).sum(axis=1, dtype=np.uint64)
+
+
+def luminance(pixels: np.ndarray) -> np.ndarray:
+    """Integer Rec.601 luma of a BGR(A) frame as uint8."""
+    bgr = pixels[..., :3].astype(np.uint16)
+    return ((bgr[..., 0] * 29 + bgr[..., 1] * 150 + bgr[..., 2] * 77) >> 8).astype(np.uint8)
+
+
+def ink_thumbnail(pixels: np.ndarray, factor: int = 4, contrast: int = 60) -> np.ndarray:
+    """Downsampled glyph density: the share of bright "ink" pixels in each cell.
+
+    A pixel counts as ink when it is ``contrast`` levels above the frame's median
+    luminance, which tracks the translucent chat background. Global brightness
+    changes and dim effects behind the box therefore leave the thumbnail alone.
+    """
+    luma = luminance(pixels)
+    ink = luma > np.median(luma) + contrast
+    height = ink.shape[0] // factor * factor
+    width = ink.shape[1] // factor * factor
+    if not height or not width:
+        return ink.astype(np.float32)
+    blocks = ink[:height, :width].reshape(height // factor, factor, width // factor, factor)
+    return blocks.mean(axis=(1, 3), dtype=np.float32)
+
+
+def change_score(previous: np.ndarray, current: np.ndarray, delta: float = 0.25) -> float:
+    """Share of thumbnail cells whose ink density moved by more than ``delta``."""
+    if previous.shape != current.shape:
+        return 1.0
+    return float(np.count_nonzero(np.abs(current - previous) > delta)) / max(current.size, 1)
+
+
+def row_activity(pixels: np.ndarray, contrast: int = 48) -> np.ndarray:
+    """Mark scanlines that carry glyph pixels, i.e. rows much brighter than their own mean."""
+    luma = luminance(pixels)
+    return (luma.max(axis=1).astype(np.int16) - luma.mean(axis=1)) > contrast
+
+
+def dirty_bands(previous: np.ndarray, current: np.ndarray, active: np.ndarray) -> List[Band]:
+    """Group changed scanlines into ``(top, bottom)`` bands widened to whole text lines.
+
+    Each run of changed rows grows outwards until it reaches a row without glyph
+    pixels, so a band never cuts through a line of text. Touching bands are merged.
+    """
+    height = current.shape[0]
+    if previous.shape != current.shape:
+        return [(0, height)]
+    changed = np.flatnonzero(previous != current)
+    if not changed.size:
+        return []
+
+    breaks = np.flatnonzero(np.diff(changed) > 1)
+    starts = changed[np.r_[0, breaks + 1]]
+    stops = changed[np.r_[breaks, changed.size - 1]] + 1
+
+    idle = np.flatnonzero(~active)
+    if not idle.size:
+        # Ink on every row, e.g. a scrollbar or frame edge running the full height:
+        # no row to stop at, so the whole region is one band.
+        return [(0, height)]
+    # Nearest idle row at or above each start, and at or below each stop.
+    above = np.searchsorted(idle, starts, side="right") - 1
+    tops = np.where(above >= 0, idle[np.maximum(above, 0)] + 1, 0)
+    tops = np.minimum(tops, starts)
+    below = np.searchsorted(idle, stops, side="left")
+    bottoms = np.where(below < idle.size, idle[np.minimum(below, idle.size - 1)], height)
+    bottoms = np.maximum(bottoms, stops)
+
+    bands: List[Band] = []
+    for top, bottom in zip(tops.tolist(), bottoms.tolist()):
+        if bands and top <= bands[-1][1]:
+            bands[-1] = (bands[-1][0], max(bands[-1][1], bottom))
+        else:
+            bands.append((top, bottom))
+    return bands
+
+
+def estimate_scroll(previous: np.ndarray, current: np.ndarray, min_match: float = 0.9) -> int:
+    """Estimate how many rows the content moved up between two frames (negative: down).
+
+    Rows whose hash is unique in both frames serve as anchors; blank background rows
+    repeat and are ignored. The most common anchor offset is accepted only when at
+    least ``min_match`` of the overlapping rows agree exactly. Returns 0 otherwise.
+    """
+    if previous.shape != current.shape:
+        return 0
+    height = current.shape[0]
+    prev_values, prev_index, prev_counts = np.unique(previous, return_index=True, return_counts=True)
+    cur_values, cur_index, cur_counts = np.unique(current, return_index=True, return_counts=True)
+    prev_unique = prev_counts == 1
+    cur_unique = cur_counts == 1
+    _, prev_pos, cur_pos = np.intersect1d(
+        prev_values[prev_unique], cur_values[cur_unique], assume_unique=True, return_indices=True
+    )
+    if not prev_pos.size:
+        return 0
+    offsets = prev_index[prev_unique][prev_pos] - cur_index[cur_unique][cur_pos]
+    shift = int(np.bincount(offsets + height).argmax()) - height
+    overlap = height - abs(shift)
+    if shift == 0 or overlap < height // 3:
+        return 0
+    if shift > 0:
+        matched = np.count_nonzero(previous[shift:] == current[:overlap])
+    else:
+        matched = np.count_nonzero(previous[:overlap] == current[-shift:])
+    return shift if matched >= overlap * min_match else 0
+
+
+def align_rows(previous: np.ndarray, current: np.ndarray, shift: int) -> np.ndarray:
+    """Line ``previous`` up with ``current`` after a scroll of ``shift`` rows.
+
+    Rows scrolled into view have no counterpart and are filled so they compare unequal.
+    """
+    aligned = ~current
+    height = current.shape[0]
+    if shift > 0:
+        aligned[: height - shift] = previous[shift:]
+    elif shift < 0:
+        aligned[-shift:] = previous[: height + shift]
+    else:
+        aligned[:] = previous
+    return aligned
+
+
+def text_mask(pixels: np.ndarray, contrast: int = 60, chroma: int = 80) -> np.ndarray:
+    """Pixels that look like chat glyphs: bright against the background, or strongly coloured."""
+    bgr = pixels[..., :3]
+    luma = luminance(pixels)
+    floor = float(np.median(luma))
+    high = bgr.max(axis=2).astype(np.int16)
+    low = bgr.min(axis=2).astype(np.int16)
+    colourful = ((high - low) > chroma) & (high > floor + contrast // 2)
+    return (luma > floor + contrast) | colourful
+
+
+def prepare_text_image(
+    pixels: np.ndarray,
+    *,
+    contrast: int = 60,
+    binarize: bool = True,
+    margin: int = 4,
+) -> Optional[Tuple[np.ndarray, int, int]]:
+    """Mask out the chat background and crop to the text, ready for the OCR engine.
+
+    Returns ``(bgr_image, left, top)`` where ``left``/``top`` map engine coordinates
+    back into the frame, or ``None`` when the frame holds no glyph pixels at all.
+    With ``binarize`` the text becomes black on white; otherwise the original
+    colours are kept on a black background.
+    """
+    mask = text_mask(pixels, contrast)
+    rows = np.flatnonzero(mask.any(axis=1))
+    if not rows.size:
+        return None
+    cols = np.flatnonzero(mask.any(axis=0))
+    top = max(int(rows[0]) - margin, 0)
+    bottom = min(int(rows[-1]) + margin + 1, mask.shape[0])
+    left = max(int(cols[0]) - margin, 0)
+    right = min(int(cols[-1]) + margin + 1, mask.shape[1])
+    crop = mask[top:bottom, left:right]
+    if binarize:
+        gray = np.where(crop, np.uint8(0), np.uint8(255))
+        image = np.repeat(gray[:, :, None], 3, axis=2)
+    else:
+        image = np.where(crop[:, :, None], pixels[top:bottom, left:right, :3], np.uint8(0))
+    return image, left, top
+
+
+def text_lines(
+    pixels: np.ndarray,
+    *,
+    contrast: int = 60,
+    padding: int = 2,
+    max_gap: int = 1,
+    spread: float = 0.5,
+) -> Optional[List[Rect]]:
+    """Split a chat frame into ``(left, top, right, bottom)`` line boxes from its row profile.
+
+    Runs of rows holding glyph pixels (gaps up to ``max_gap`` rows are bridged, for
+    accents and dots) are taken as text lines. The chat font has a fixed line
+    height, so when any run is more than ``spread`` away from the median height the
+    profile is considered irregular (icons, overlapping lines, wrapped text with
+    no spacing) and ``None`` is returned so the caller can fall back to detection.
+    """
+    mask = text_mask(pixels, contrast)
+    rows = np.flatnonzero(mask.any(axis=1))
+    if not rows.size:
+        return []
+    breaks = np.flatnonzero(np.diff(rows) > max_gap + 1)
+    starts = rows[np.r_[0, breaks + 1]]
+    stops = rows[np.r_[breaks, rows.size - 1]] + 1
+    heights = stops - starts
+    median = float(np.median(heights))
+    if np.any(heights > median * (1 + spread)) or np.any(heights < median * (1 - spread)):
+        return None
+
+    height, width = mask.shape
+    lines: List[Rect] = []
+    for top, bottom in zip(starts.tolist(), stops.tolist()):
+        cols = np.flatnonzero(mask[top:bottom].any(axis=0))
+        lines.append(
+            (
+                max(int(cols[0]) - padding, 0),
+                max(top - padding, 0),
+                min(int(cols[-1]) + 1 + padding, width),
+                min(bottom + padding, height),
+            )
+        )
+    return lines
@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+import frame_analysis
+from config_manager import GLYPH_TABLE_PATH, load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+_TABLE_VERSION = 1
+# Seconds between automatic saves while the table keeps learning.
+_SAVE_INTERVAL = 60.0
+# Widest run of cells, in line heights, that may still be one (CJK) character.
+_WIDE_GLYPH = 1.2
+# Readings of a gap width needed, nine in ten agreeing, before it is known to be a space or not.
+_GAP_VOTES = 5
+
+
+@dataclass
+class GlyphWord:
+    """One word of a line crop: its column span, the keys and spans of its glyph cells,
+    the blank columns before it and the ink height of its line."""
+
+    left: int
+    right: int
+    keys: List[str]
+    spans: List[Tuple[int, int]]
+    gap: int = 0
+    height: int = 0
+
+
+class GlyphTable:
+    """Experimental glyph-level recogniser for the fixed chat font (``ocr.glyph_cache``).
+
+    A line crop is cut into words at ink gaps of at least ``space_ratio`` times the
+    line's ink height, and each word into cells at blank columns. A cell is one
+    glyph, or a few glyphs that touch; its key hashes the cell's ink bitmap and its
+    offset from the line's baseline, so a comma and an apostrophe stay apart.
+
+    The table learns from neural OCR output scoring at least ``learn_score``.
+    When the line's characters can be placed on its cells in exactly one way, one
+    character per cell or a wide character over a few cells (CJK glyphs with blank
+    columns inside), each cell learns its character. Otherwise, when the reading has
+    as many words as the crop, words are matched to cells one to one, or, with all
+    other cells of the word already known, a single unknown cell takes the
+    remaining characters. A key is trusted once it was read the same way
+    ``min_votes`` times and never differently. At most ``capacity`` keys are kept,
+    least recently used first out.
+
+    Where to put spaces is learned too, by the width of the blank gap before a
+    cell, so rebuilt lines keep the spacing the recogniser would have produced.
+    A line with a gap width not yet read consistently often enough is left to
+    the recogniser, like one with an unknown cell.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        *,
+        min_votes: int = 2,
+        learn_score: float = 0.95,
+        capacity: int = 8192,
+        space_ratio: float = 0.25,
+        contrast: int = 60,
+    ) -> None:
+        self.path = path
+        self.min_votes = max(int(min_votes), 1)
+        self.learn_score = float(learn_score)
+        self.capacity = max(int(capacity), 1)
+        self.space_ratio = float(space_ratio)
+        self.contrast = int(contrast)
+        self._votes: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        # gap width -> [times read with a space, times read without]
+        self._gaps: Dict[int, List[int]] = {}
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        # save() may run on the GUI thread at shutdown while the OCR thread still learns.
+        self._lock = threading.Lock()
+        if path is not None:
+            self._load(path)
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Mapping[str, Any]]) -> Optional["GlyphTable"]:
+        """Build the table described by ``ocr.glyph_cache``, or None when it is disabled."""
+        if not isinstance(cfg, Mapping) or not cfg.get("enabled", False):
+            return None
+        return cls(
+            GLYPH_TABLE_PATH,
+            min_votes=int(cfg.get("min_votes", 2)),
+            learn_score=float(cfg.get("learn_score", 0.95)),
+            capacity=int(cfg.get("capacity", 8192)),
+        )
+
+    def __len__(self) -> int:
+        return len(self._votes)
+
+    def segment(self, crop: np.ndarray) -> Optional[List[GlyphWord]]:
+        """Words and glyph cells of a line crop, or None when it holds no ink."""
+        luma = frame_analysis.luminance(crop)
+        floor = float(np.median(luma))
+        if floor > 127:  # binarised crops: dark text on white
+            ink = luma < floor - self.contrast
+        else:
+            ink = frame_analysis.text_mask(crop, self.contrast)
+        rows = np.flatnonzero(ink.any(axis=1))
+        if not rows.size:
+            return None
+        columns = np.flatnonzero(ink.any(axis=0))
+        breaks = np.flatnonzero(np.diff(columns) > 1)
+        starts = columns[np.r_[0, breaks + 1]].tolist()
+        stops = (columns[np.r_[breaks, columns.size - 1]] + 1).tolist()
+
+        cells = []
+        for start, stop in zip(starts, stops):
+            cell_rows = np.flatnonzero(ink[:, start:stop].any(axis=1))
+            cells.append((start, stop, int(cell_rows[0]), int(cell_rows[-1]) + 1))
+        baseline = int(np.bincount([bottom for _, _, _, bottom in cells]).argmax())
+        space = max(2, round((rows[-1] + 1 - rows[0]) * self.space_ratio))
+
+        height = int(rows[-1] + 1 - rows[0])
+        words: List[GlyphWord] = []
+        previous = None
+        for start, stop, top, bottom in cells:
+            if previous is None or start - previous >= space:
+                words.append(GlyphWord(start, stop, [], [], 0 if previous is None else start - previous, height))
+            bitmap = ink[top:bottom, start:stop]
+            digest = hashlib.blake2b(digest_size=12)
+            digest.update(np.asarray([bottom - top, stop - start, bottom - baseline], dtype=np.int16).tobytes())
+            digest.update(np.packbits(bitmap).tobytes())
+            words[-1].keys.append(digest.hexdigest())
+            words[-1].spans.append((start, stop))
+            words[-1].right = stop
+            previous = stop
+        return words
+
+    def read_line(self, words: Sequence[GlyphWord]) -> Optional[str]:
+        """The line's text when every cell is trusted, spaced as learned, else None."""
+        line = ""
+        previous = 0
+        for word in words:
+            for key, (start, stop) in zip(word.keys, word.spans):
+                text = self._trusted(key)
+                if text is None:
+                    return None
+                if text:
+                    if line:
+                        spaced = self._spaced(start - previous)
+                        if spaced is None:
+                            return None
+                        if spaced:
+                            line += " "
+                    line += text
+                previous = stop
+        with self._lock:
+            for word in words:
+                for key in word.keys:
+                    self._votes.move_to_end(key)
+        return line
+
+    def learn(self, words: Sequence[GlyphWord], text: str, score: float) -> None:
+        """Learn from a whole line read by the neural recogniser."""
+        if score < self.learn_score or not words:
+            return
+        if not self._learn_cells(words, text):
+            tokens = text.split()
+            if len(tokens) != len(words):
+                return
+            for word, token in zip(words, tokens):
+                self._learn_word(word, token)
+            for word in words[1:]:
+                self._vote_gap(word.gap, True)
+        self._maybe_save()
+
+    def save(self) -> None:
+        if not self._dirty or self.path is None:
+            return
+        with self._lock:
+            glyphs = {key: dict(readings) for key, readings in self._votes.items()}
+            gaps = {str(gap): list(votes) for gap, votes in self._gaps.items()}
+            self._dirty = False
+        save_json(self.path, {"version": _TABLE_VERSION, "glyphs": glyphs, "gaps": gaps})
+        self._saved_at = time.monotonic()
+
+    def _trusted(self, key: str) -> Optional[str]:
+        readings = self._votes.get(key)
+        if not readings or len(readings) != 1:
+            return None
+        text, votes = next(iter(readings.items()))
+        return text if votes >= self.min_votes else None
+
+    def _learn_cells(self, words: Sequence[GlyphWord], text: str) -> bool:
+        """Learn a line whose characters fit its cells in exactly one way; False if they do not."""
+        cells = [
+            (key, span, index) for index, word in enumerate(words) for key, span in zip(word.keys, word.spans)
+        ]
+        chars: List[Tuple[str, bool]] = []
+        spaced = False
+        for char in text.strip():
+            if char.isspace():
+                spaced = True
+                continue
+            chars.append((char, spaced))
+            spaced = False
+        if not chars or len(chars) > len(cells):
+            return False
+
+        def fits(first: int, count: int, char: str) -> bool:
+            # A character takes one cell, or a few cells of one word if it is wide.
+            last = first + count - 1
+            if count == 1:
+                return True
+            if not _is_wide(char) or cells[first][2] != cells[last][2]:
+                return False
+            return cells[last][1][1] - cells[first][1][0] <= words[cells[first][2]].height * _WIDE_GLYPH
+
+        # ways[i][j]: placements of the first j characters on the first i cells, capped at 2.
+        ways = [[0] * (len(chars) + 1) for _ in range(len(cells) + 1)]
+        ways[0][0] = 1
+        for first in range(len(cells)):
+            for index, (char, _) in enumerate(chars):
+                if not ways[first][index]:
+                    continue
+                count = 1
+                while first + count <= len(cells) and fits(first, count, char):
+                    ways[first + count][index + 1] = min(ways[first + count][index + 1] + ways[first][index], 2)
+                    count += 1
+        if ways[len(cells)][len(chars)] != 1:
+            return False
+
+        groups: List[Tuple[int, int]] = []
+        stop = len(cells)
+        for index in range(len(chars) - 1, -1, -1):
+            count = 1
+            while not (ways[stop - count][index] and fits(stop - count, count, chars[index][0])):
+                count += 1
+            groups.append((stop - count, count))
+            stop -= count
+        groups.reverse()
+        for (first, count), (char, spaced) in zip(groups, chars):
+            self._vote(cells[first][0], char)
+            for offset in range(1, count):
+                self._vote(cells[first + offset][0], "")
+            if first:
+                self._vote_gap(cells[first][1][0] - cells[first - 1][1][1], spaced)
+        return True
+
+    def _learn_word(self, word: GlyphWord, token: str) -> None:
+        keys = word.keys
+        if len(keys) == len(token):
+            for key, char in zip(keys, token):
+                self._vote(key, char)
+            return
+        if len(keys) == 1:
+            self._vote(keys[0], token)
+            return
+        # Several touching glyphs share a cell: place the known cells around the
+        # one unknown cell, which then takes whatever text is left in between.
+        known = [self._trusted(key) for key in keys]
+        if known.count(None) != 1:
+            return
+        gap = known.index(None)
+        head = "".join(known[:gap])
+        tail = "".join(known[gap + 1:])
+        if len(head) + len(tail) >= len(token) or not token.startswith(head) or not token.endswith(tail):
+            return
+        self._vote(keys[gap], token[len(head):len(token) - len(tail)])
+
+    def _vote(self, key: str, text: str) -> None:
+        with self._lock:
+            readings = self._votes.setdefault(key, {})
+            readings[text] = readings.get(text, 0) + 1
+            self._votes.move_to_end(key)
+            while len(self._votes) > self.capacity:
+                self._votes.popitem(last=False)
+            self._dirty = True
+
+    def _vote_gap(self, gap: int, spaced: bool) -> None:
+        with self._lock:
+            self._gaps.setdefault(gap, [0, 0])[0 if spaced else 1] += 1
+            self._dirty = True
+
+    def _spaced(self, gap: int) -> Optional[bool]:
+        spaced, joined = self._gaps.get(gap, (0, 0))
+        if spaced + joined < _GAP_VOTES:
+            return None
+        if spaced >= 9 * joined:
+            return True
+        if joined >= 9 * spaced:
+            return False
+        return None
+
+    def _maybe_save(self) -> None:
+        if self._dirty and time.monotonic() - self._saved_at >= _SAVE_INTERVAL:
+            self.save()
+
+    def _load(self, path: Path) -> None:
+        raw = load_json(path, {})
+        if not isinstance(raw, dict) or raw.get("version") != _TABLE_VERSION:
+            return
+        glyphs = raw.get("glyphs")
+        if not isinstance(glyphs, dict):
+            return
+        for key, readings in glyphs.items():
+            if isinstance(readings, dict):
+                self._votes[str(key)] = {str(text): int(votes) for text, votes in readings.items()}
+        while len(self._votes) > self.capacity:
+            self._votes.popitem(last=False)
+        gaps = raw.get("gaps")
+        if isinstance(gaps, dict):
+            for gap, votes in gaps.items():
+                if isinstance(votes, list) and len(votes) == 2:
+                    self._gaps[int(gap)] = [int(votes[0]), int(votes[1])]
+        logger.info("Loaded %d glyphs from %s", len(self._votes), path)
+
+
+def _is_wide(char: str) -> bool:
+    return unicodedata.east_asian_width(char) in ("W", "F")
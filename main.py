@@ -3,18 +3,19 @@
 import argparse
 import concurrent.futures
 import logging
+import multiprocessing
 import sys
 import threading
 import time
 from pathlib import Path
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 from PySide6 import QtCore, QtWidgets, QtGui
 import keyboard
 
 from config_manager import ConfigManager, GlossaryManager
 from hotkey_listener import HotkeyListener
-from ocr_manager import OcrController
+from ocr_manager import MAIN_REGION, OcrController
 from prompt_manager import PromptManager
 from translator import LocalOpusConfig, LocalOpusTranslator, QwenConfig, QwenTranslator
 from ui import FloatingPanel, PromptEditor, OcrResultWindow
@@ -35,8 +36,16 @@ class TranslatorController(QtWidgets.QApplication):
     showPromptsRequested = QtCore.Signal()
     submissionRequested = QtCore.Signal(str, bool)
 
-    def __init__(self, argv: List[str], *, enable_ocr: bool = True, no_hotkeys: bool = False) -> None:
+    def __init__(
+        self,
+        argv: List[str],
+        *,
+        enable_ocr: bool = True,
+        no_hotkeys: bool = False,
+        started_at: Optional[float] = None,
+    ) -> None:
         super().__init__(argv)
+        self._started_at = time.perf_counter() if started_at is None else started_at
         self.setApplicationName("WoW Translator Python")
         self.setQuitOnLastWindowClosed(False)
 
@@ -146,11 +155,13 @@ class TranslatorController(QtWidgets.QApplication):
         self._pending_panel_pos: Optional[QtCore.QPoint] = None
 
         self.ocr: OcrController | None = None
+        self._ocr_translations: Dict[str, str] = {}
         if enable_ocr:
             try:
                 self.ocr = OcrController(self.cfg, self.translator, self.prompt_manager, self.glossary)
-                self.ocr.textUpdated.connect(self._handle_ocr_update)
+                self.ocr.regionTextUpdated.connect(self._handle_ocr_update)
                 self.ocr.statusUpdated.connect(self._handle_ocr_status)
+                self.ocr_window.translationShown.connect(self.ocr.mark_translation_shown)
             except Exception as exc:  # pylint: disable=broad-except
                 logger.warning("OCR 启动失败: %s", exc, exc_info=True)
                 self.ocr_window.update_status(f"OCR 失败：{exc}")
@@ -170,11 +181,24 @@ class TranslatorController(QtWidgets.QApplication):
             self._set_session_active(True)
             self.panel.update_status("手动模式：输入后点击翻译或按 Enter，Ctrl+Enter 保留原文")
 
+        # Runs once the event loop has painted the UI; the OCR engine loads after that.
+        QtCore.QTimer.singleShot(0, self._on_startup_finished)
+
+    @QtCore.Slot()
+    def _on_startup_finished(self) -> None:
+        logger.info(
+            "Startup to UI ready: %.0f ms (panel visible: %s)",
+            (time.perf_counter() - self._started_at) * 1000.0,
+            self.panel.isVisible(),
+        )
+        if self.ocr:
+            self.ocr.warm_up()
+
     def shutdown(self) -> None:
         if not self._hotkeys_disabled:
             self.hotkeys.stop()
         if self.ocr:
-            self.ocr.stop()
+            self.ocr.shutdown()
         self._executor.shutdown(wait=False)
         self.panel.close()
         self.ocr_window.close()
@@ -257,6 +281,7 @@ class TranslatorController(QtWidgets.QApplication):
         if self.ocr.is_active():
             self.ocr_window.set_pass_through(False)
             self.ocr.stop()
+            self._ocr_translations.clear()
             self.ocr_window.update_status("OCR stopped")
             self.ocr_window.hide()
         else:
@@ -424,9 +449,15 @@ class TranslatorController(QtWidgets.QApplication):
             translation = self.glossary.translate(translation)
         return translation
 
-    @QtCore.Slot(str, str)
-    def _handle_ocr_update(self, original: str, translation: str) -> None:
-        self.ocr_window.update_translation(translation)
+    @QtCore.Slot(str, str, str)
+    def _handle_ocr_update(self, region: str, original: str, translation: str) -> None:
+        self._ocr_translations[region] = translation
+        if list(self._ocr_translations) == [MAIN_REGION]:
+            self.ocr_window.update_translation(translation)
+            return
+        names = sorted(self._ocr_translations, key=lambda name: (name != MAIN_REGION, name))
+        sections = [f"【{name}】\n{self._ocr_translations[name]}" for name in names if self._ocr_translations[name]]
+        self.ocr_window.update_translation("\n\n".join(sections))
 
     @QtCore.Slot(str)
     def _handle_ocr_status(self, text: str) -> None:
@@ -434,6 +465,7 @@ class TranslatorController(QtWidgets.QApplication):
 
 
 def main(argv: list[str] | None = None) -> int:
+    started_at = time.perf_counter()
     parser = argparse.ArgumentParser(description="WoW Translator Python Edition")
     parser.add_argument("--no-hotkeys", action="store_true", help="仅使用 GUI 而不注册全局热键")
     parser.add_argument("--no-ocr", action="store_true", help="禁用 OCR 功能")
@@ -442,7 +474,9 @@ def main(argv: list[str] | None = None) -> int:
     program_name = sys.argv[0] if argv is None else "wow-translator"
     qt_args = [program_name, *qt_extra]
 
-    app = TranslatorController(qt_args, enable_ocr=not args.no_ocr, no_hotkeys=args.no_hotkeys)
+    app = TranslatorController(
+        qt_args, enable_ocr=not args.no_ocr, no_hotkeys=args.no_hotkeys, started_at=started_at
+    )
 
     exit_code = app.exec()
     app.shutdown()
@@ -450,5 +484,6 @@ def main(argv: list[str] | None = None) -> int:
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # the optional OCR worker process is spawned from this script
     sys.exit(main())
 
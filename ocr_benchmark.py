@@ -0,0 +1,600 @@
+"""Offline latency benchmarks for the OCR pipeline.
+
+Frames come either from PNG files (``--image``, repeatable) or from live screen
+grabs of the region saved in ``config/settings.json``.
+
+    python ocr_benchmark.py handoff --frames 20
+    python ocr_benchmark.py handoff --image chat1.png --image chat2.png
+    python ocr_benchmark.py capture --frames 50
+    python ocr_benchmark.py preprocess --image chat1.png
+    python ocr_benchmark.py engine --image chat1.png
+    python ocr_benchmark.py coarse --image chat1.png --upscale 2
+    python ocr_benchmark.py quantized --image chat1.png
+    python ocr_benchmark.py backends --sample
+    python ocr_benchmark.py glyphs --learn-image chat1.png --image chat2.png
+    python ocr_benchmark.py assemble
+    python ocr_benchmark.py bands
+
+Accuracy is reported when an image has a ground-truth sidecar next to it
+(``chat1.txt``, one chat line per line); otherwise the plain engine output on
+the unprocessed frame serves as the reference. ``assemble`` needs no frames: it
+replays the message-assembly regression corpus and fails on any difference.
+``bands`` checks dirty-band detection on synthetic frames the same way.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import mss
+from mss import tools
+import numpy as np
+
+from config_manager import ConfigManager
+
+# Recorded OCR segments and the messages they must assemble into, see ``assemble``.
+ASSEMBLY_CORPUS = Path(__file__).resolve().parent / "corpus" / "chat_messages.json"
+
+
+def _load_image(path: str) -> np.ndarray:
+    import cv2  # shipped with rapidocr-onnxruntime
+
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    if image is None:
+        raise SystemExit(f"cannot read image: {path}")
+    return cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+
+
+def _region_monitor() -> dict[str, int]:
+    region = ConfigManager().get_ocr_config().get("region", {})
+    return {
+        "left": int(region.get("x", 0)),
+        "top": int(region.get("y", 0)),
+        "width": max(int(region.get("width", 0)), 1),
+        "height": max(int(region.get("height", 0)), 1),
+    }
+
+
+def _grab_frames(count: int, interval: float) -> List[np.ndarray]:
+    monitor = _region_monitor()
+    frames: List[np.ndarray] = []
+    with mss.mss() as grabber:
+        for _ in range(count):
+            shot = grabber.grab(monitor)
+            frames.append(np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4))
+            time.sleep(interval)
+    return frames
+
+
+def load_frames(args: argparse.Namespace) -> List[np.ndarray]:
+    if args.image:
+        return [_load_image(path) for path in args.image]
+    return _grab_frames(args.frames, args.grab_interval)
+
+
+def load_truth(args: argparse.Namespace) -> List[Optional[str]]:
+    if not args.image:
+        return [None] * args.frames
+    truths: List[Optional[str]] = []
+    for path in args.image:
+        sidecar = Path(path).with_suffix(".txt")
+        truths.append(sidecar.read_text(encoding="utf-8-sig") if sidecar.exists() else None)
+    return truths
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def char_accuracy(predicted: str, truth: str) -> float:
+    """1 - Levenshtein distance / reference length, on whitespace-collapsed text."""
+    predicted = _normalize_text(predicted)
+    truth = _normalize_text(truth)
+    if not truth:
+        return 1.0 if not predicted else 0.0
+    previous = list(range(len(predicted) + 1))
+    for i, expected in enumerate(truth, 1):
+        current = [i]
+        for j, got in enumerate(predicted, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (expected != got)))
+        previous = current
+    return max(0.0, 1.0 - previous[-1] / len(truth))
+
+
+def result_text(result: Optional[list]) -> str:
+    return "\n".join(str(item[1]) for item in result or ())
+
+
+def _create_engine(**options):
+    try:
+        from rapidocr_onnxruntime import RapidOCR
+    except ImportError:
+        raise SystemExit("rapidocr-onnxruntime is not installed")
+    return RapidOCR(**options)
+
+
+def _create_backend(name: str, options: dict):
+    from ocr_backends import create_backend
+
+    try:
+        return create_backend(name, options)
+    except ImportError as exc:
+        raise SystemExit(f"OCR backend {name} is not installed: {exc}")
+
+
+def report(name: str, samples: Sequence[float]) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    print(
+        f"{name:<28} n={len(ordered):<4} mean={statistics.fmean(ordered):8.2f} ms  "
+        f"p50={statistics.median(ordered):8.2f} ms  p95={p95:8.2f} ms"
+    )
+
+
+def bench_handoff(args: argparse.Namespace) -> None:
+    frames = load_frames(args)
+    engine = _create_engine()
+    tmp_dir = Path(tempfile.mkdtemp(prefix="wow_translator_bench_"))
+
+    png_total: List[float] = []
+    png_handoff: List[float] = []
+    array_total: List[float] = []
+    array_handoff: List[float] = []
+
+    for index, frame in enumerate(frames):
+        height, width = frame.shape[:2]
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            path = tmp_dir / f"frame_{index}.png"
+            rgb = np.ascontiguousarray(frame[:, :, 2::-1]).tobytes()
+            tools.to_png(rgb, (width, height), output=str(path))
+            handed = time.perf_counter()
+            engine(str(path))
+            path.unlink(missing_ok=True)
+            done = time.perf_counter()
+            png_handoff.append((handed - start) * 1000.0)
+            png_total.append((done - start) * 1000.0)
+
+            start = time.perf_counter()
+            view = frame[:, :, :3]
+            handed = time.perf_counter()
+            engine(view)
+            done = time.perf_counter()
+            array_handoff.append((handed - start) * 1000.0)
+            array_total.append((done - start) * 1000.0)
+
+    tmp_dir.rmdir()
+    print(f"frames={len(frames)} repeat={args.repeat}")
+    report("png handoff", png_handoff)
+    report("png capture->ocr", png_total)
+    report("array handoff", array_handoff)
+    report("array capture->ocr", array_total)
+
+
+def bench_capture(args: argparse.Namespace) -> None:
+    monitor = _region_monitor()
+    per_tick: List[float] = []
+    for _ in range(args.frames):
+        start = time.perf_counter()
+        with mss.mss() as grabber:
+            grabber.grab(monitor)
+        per_tick.append((time.perf_counter() - start) * 1000.0)
+        time.sleep(args.grab_interval)
+
+    persistent: List[float] = []
+    with mss.mss() as grabber:
+        for _ in range(args.frames):
+            start = time.perf_counter()
+            grabber.grab(monitor)
+            persistent.append((time.perf_counter() - start) * 1000.0)
+            time.sleep(args.grab_interval)
+
+    print(f"region={monitor['width']}x{monitor['height']} frames={args.frames}")
+    report("grabber per tick", per_tick)
+    report("persistent grabber", persistent)
+
+
+def bench_preprocess(args: argparse.Namespace) -> None:
+    from frame_analysis import prepare_text_image
+
+    frames = load_frames(args)
+    truths = load_truth(args)
+    engine = _create_engine()
+    engine(frames[0][:, :, :3])  # warm-up
+
+    timings = {"raw": [], "masked": []}
+    accuracy = {"raw": [], "masked": []}
+    pixels = {"raw": 0, "masked": 0}
+    for frame, truth in zip(frames, truths):
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            raw_result, _ = engine(frame[:, :, :3])
+            timings["raw"].append((time.perf_counter() - start) * 1000.0)
+
+            start = time.perf_counter()
+            prepared = prepare_text_image(frame, contrast=args.contrast, binarize=not args.keep_colour)
+            masked_result = engine(prepared[0])[0] if prepared else None
+            timings["masked"].append((time.perf_counter() - start) * 1000.0)
+
+        reference = truth if truth is not None else result_text(raw_result)
+        accuracy["raw"].append(char_accuracy(result_text(raw_result), reference))
+        accuracy["masked"].append(char_accuracy(result_text(masked_result), reference))
+        pixels["raw"] += frame.shape[0] * frame.shape[1]
+        pixels["masked"] += prepared[0].shape[0] * prepared[0].shape[1] if prepared else 0
+
+    print(f"frames={len(frames)} repeat={args.repeat} ground_truth={sum(t is not None for t in truths)}")
+    for name in ("raw", "masked"):
+        report(f"{name} preprocess+ocr", timings[name])
+        print(f"{'':<28} char_accuracy={statistics.fmean(accuracy[name]):.4f}  pixels={pixels[name]}")
+
+
+# Alternative values tried one at a time against the configured ``ocr.engine`` options.
+_ENGINE_VARIANTS = {
+    "use_cls": [True],
+    "det_limit_type": ["min"],
+    "det_limit_side_len": [640, 736, 1280],
+    "rec_batch_num": [1, 12],
+    "intra_op_num_threads": [1, 2, 4],
+}
+
+
+def bench_engine(args: argparse.Namespace) -> None:
+    from ocr_engine import OcrEngine, engine_options
+
+    frames = load_frames(args)
+    truths = load_truth(args)
+    base = engine_options(ConfigManager().get_ocr_config().get("engine"))
+    variants = [("configured", base)]
+    for key, values in _ENGINE_VARIANTS.items():
+        for value in values:
+            if base[key] != value:
+                variants.append((f"{key}={value}", {**base, key: value}))
+
+    reference: List[str] = []
+    print(f"frames={len(frames)} repeat={args.repeat} configured={base}")
+    for name, options in variants:
+        engine = OcrEngine(_create_backend("rapidocr", options), line_cache_size=0)
+        engine(frames[0][:, :, :3])  # warm-up
+        timings: List[float] = []
+        accuracy: List[float] = []
+        for index, (frame, truth) in enumerate(zip(frames, truths)):
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = engine(frame[:, :, :3])
+                timings.append((time.perf_counter() - start) * 1000.0)
+            text = result_text(result)
+            if name == "configured":
+                reference.append(text)
+            accuracy.append(char_accuracy(text, truth if truth is not None else reference[index]))
+        report(name, timings)
+        print(f"{'':<28} char_accuracy={statistics.fmean(accuracy):.4f}  {engine.stats.summary()}")
+
+
+def bench_coarse(args: argparse.Namespace) -> None:
+    import cv2  # shipped with rapidocr-onnxruntime
+
+    from ocr_engine import OcrEngine, engine_options
+
+    frames = load_frames(args)
+    truths = load_truth(args)
+    if args.upscale > 1.0:
+        # Stand-in for a 1440p/4K capture of the same chat box.
+        frames = [
+            cv2.resize(frame, None, fx=args.upscale, fy=args.upscale, interpolation=cv2.INTER_CUBIC)
+            for frame in frames
+        ]
+    options = engine_options(ConfigManager().get_ocr_config().get("engine"))
+    backend = _create_backend("rapidocr", options)
+    height, width = frames[0].shape[:2]
+    print(f"frames={len(frames)} size={width}x{height} repeat={args.repeat}")
+
+    reference: List[str] = []
+    for scale in args.scale or [1.0, 0.75, 0.5]:
+        engine = OcrEngine(backend, line_cache_size=0, detect_scale=scale)
+        engine(frames[0][:, :, :3])  # warm-up
+        engine.stats.reset()
+        timings: List[float] = []
+        accuracy: List[float] = []
+        for index, (frame, truth) in enumerate(zip(frames, truths)):
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = engine(frame[:, :, :3])
+                timings.append((time.perf_counter() - start) * 1000.0)
+            text = result_text(result)
+            if len(reference) <= index:
+                reference.append(text)
+            accuracy.append(char_accuracy(text, truth if truth is not None else reference[index]))
+        report(f"detect_scale={scale:g}", timings)
+        print(
+            f"{'':<28} char_accuracy={statistics.fmean(accuracy):.4f}  "
+            f"detect={engine.stats.average_ms('detect'):.1f} ms  "
+            f"recognize={engine.stats.average_ms('recognize_lines'):.1f} ms"
+        )
+
+
+def bench_quantized(args: argparse.Namespace) -> None:
+    from ocr_engine import OcrEngine, engine_options
+    from ocr_quantize import QUANTIZED_DIR, QUANTIZED_NAMES
+
+    frames = load_frames(args)
+    truths = load_truth(args)
+    base = engine_options(ConfigManager().get_ocr_config().get("engine"))
+    base.update(det_model_path="", rec_model_path="")
+    quantized = {}
+    for kind, name in QUANTIZED_NAMES.items():
+        path = getattr(args, kind) or str(QUANTIZED_DIR / name)
+        if Path(path).is_file():
+            quantized[f"{kind}_model_path"] = path
+    if not quantized:
+        raise SystemExit(f"no quantized models in {QUANTIZED_DIR}; run ocr_quantize.py first")
+
+    variants = [("float", base)]
+    for key, path in quantized.items():
+        variants.append((f"int8 {key.split('_')[0]}", {**base, key: path}))
+    if len(quantized) > 1:
+        variants.append(("int8 det+rec", {**base, **quantized}))
+
+    reference: List[str] = []
+    print(f"frames={len(frames)} repeat={args.repeat} models={quantized}")
+    for name, options in variants:
+        engine = OcrEngine(_create_backend("rapidocr", options), line_cache_size=0)
+        engine(frames[0][:, :, :3])  # warm-up
+        engine.stats.reset()
+        timings: List[float] = []
+        accuracy: List[float] = []
+        for index, (frame, truth) in enumerate(zip(frames, truths)):
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = engine(frame[:, :, :3])
+                timings.append((time.perf_counter() - start) * 1000.0)
+            text = result_text(result)
+            if name == "float":
+                reference.append(text)
+            accuracy.append(char_accuracy(text, truth if truth is not None else reference[index]))
+        report(name, timings)
+        print(
+            f"{'':<28} char_accuracy={statistics.fmean(accuracy):.4f}  "
+            f"detect={engine.stats.average_ms('detect'):.1f} ms  "
+            f"recognize={engine.stats.average_ms('recognize_lines'):.1f} ms"
+        )
+
+
+def bench_backends(args: argparse.Namespace) -> None:
+    from ocr_backends import available_backends, sample_frame
+    from ocr_engine import OcrEngine, engine_options
+
+    if args.sample:
+        frame, text = sample_frame()
+        frames, truths = [frame], [text]
+    else:
+        frames, truths = load_frames(args), load_truth(args)
+    options = engine_options(ConfigManager().get_ocr_config().get("engine"))
+    names = available_backends()
+    print(f"frames={len(frames)} repeat={args.repeat} backends={names}")
+
+    reference: List[str] = []
+    for name in names:
+        started = time.perf_counter()
+        engine = OcrEngine(_create_backend(name, options), line_cache_size=0)
+        engine.warm_up()
+        load_ms = (time.perf_counter() - started) * 1000.0
+        timings: List[float] = []
+        accuracy: List[float] = []
+        for index, (frame, truth) in enumerate(zip(frames, truths)):
+            engine(frame[:, :, :3])
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = engine(frame[:, :, :3])
+                timings.append((time.perf_counter() - start) * 1000.0)
+            text = result_text(result)
+            if len(reference) <= index:
+                reference.append(text)
+            accuracy.append(char_accuracy(text, truth if truth is not None else reference[index]))
+        report(name, timings)
+        print(f"{'':<28} char_accuracy={statistics.fmean(accuracy):.4f}  load+warm-up={load_ms:.0f} ms")
+
+
+def bench_glyphs(args: argparse.Namespace) -> None:
+    from frame_analysis import text_lines
+    from glyph_cache import GlyphTable
+    from ocr_engine import OcrEngine, engine_options
+
+    frames = load_frames(args)
+    truths = load_truth(args)
+    learn_frames = [_load_image(path) for path in args.learn_image or ()]
+    options = engine_options(ConfigManager().get_ocr_config().get("engine"))
+    backend = _create_backend("rapidocr", options)
+    neural = OcrEngine(backend, line_cache_size=0)
+    table = GlyphTable(min_votes=args.min_votes)
+    glyphs = OcrEngine(backend, line_cache_size=0, glyph_table=table)
+
+    def boxes(frame: np.ndarray) -> list:
+        lines = text_lines(frame)
+        if lines is None:
+            raise SystemExit("frame has irregular line heights; glyph reading needs fixed line boxes")
+        return lines
+
+    for frame in learn_frames or frames:
+        glyphs.recognize_boxes(frame[:, :, :3], boxes(frame))
+    print(f"frames={len(frames)} learned_from={len(learn_frames) or len(frames)} glyph_keys={len(table)}")
+
+    reference: List[str] = []
+    for name, engine in (("neural", neural), ("glyph table", glyphs)):
+        engine.stats.reset()
+        timings: List[float] = []
+        accuracy: List[float] = []
+        for index, (frame, truth) in enumerate(zip(frames, truths)):
+            lines = boxes(frame)
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = engine.recognize_boxes(frame[:, :, :3], lines)
+                timings.append((time.perf_counter() - start) * 1000.0)
+            text = result_text(result)
+            if len(reference) <= index:
+                reference.append(text)
+            accuracy.append(char_accuracy(text, truth if truth is not None else reference[index]))
+        report(name, timings)
+        print(f"{'':<28} char_accuracy={statistics.fmean(accuracy):.4f}  {engine.stats.summary()}")
+
+
+def check_assembly(args: argparse.Namespace) -> None:
+    """Replay the corpus through ``MessageAssembler``.
+
+    Each case feeds its frames to one assembler in order. Expected messages are
+    ``[label, text]`` pairs: the texts must match exactly, and within a case two
+    messages must share an identity exactly when they share a label.
+    """
+    from chat_messages import MessageAssembler, OcrSegment
+
+    corpus = json.loads(Path(args.corpus).read_text(encoding="utf-8-sig"))
+    failures = 0
+    timings: List[float] = []
+    for case in corpus["cases"]:
+        assembler = MessageAssembler()
+        problems: List[str] = []
+        ids: dict = {}
+        for index, frame in enumerate(case["frames"]):
+            segments = [OcrSegment(tuple(item[:4]), item[4], 1.0) for item in frame["segments"]]
+            start = time.perf_counter()
+            messages = assembler(segments)
+            timings.append((time.perf_counter() - start) * 1000.0)
+            expected = [text for _, text in frame["messages"]]
+            got = [message.text for message in messages]
+            if got != expected:
+                problems.append(f"frame {index}: expected {expected}\n{'':>10}got      {got}")
+                continue
+            for (label, _), message in zip(frame["messages"], messages):
+                ids.setdefault(label, set()).add(message.id)
+        for label, found in ids.items():
+            if len(found) > 1:
+                problems.append(f"{label!r} changed identity: {sorted(found)}")
+        owners: dict = {}
+        for label, found in ids.items():
+            for ident in found:
+                if ident in owners:
+                    problems.append(f"{label!r} and {owners[ident]!r} share identity {ident}")
+                owners[ident] = label
+        failures += bool(problems)
+        print(f"{'FAIL' if problems else 'ok':<6}{case['name']}")
+        for problem in problems:
+            print(f"{'':>6}{problem}")
+    report("assemble", timings)
+    if failures:
+        raise SystemExit(f"{failures} of {len(corpus['cases'])} cases failed")
+
+
+def _band_frame(lines: Sequence[int], column: bool = False) -> np.ndarray:
+    # 100x40 BGRA: a bright text line at each given top row, optionally a full-height bright column.
+    pixels = np.zeros((100, 40, 4), dtype=np.uint8)
+    for top in lines:
+        pixels[top : top + 8, 5:30:3, :3] = 255
+    if column:
+        pixels[:, 38, :3] = 255
+    return pixels
+
+
+def check_bands(args: argparse.Namespace) -> None:
+    """Check ``frame_analysis.dirty_bands`` on synthetic frames with known answers."""
+    import frame_analysis
+
+    # name, line tops before, line tops after, full-height column, expected bands
+    cases = [
+        ("unchanged", [10, 30], [10, 30], False, []),
+        ("new_line", [10, 30], [10, 30, 50], False, [(50, 58)]),
+        ("line_gone", [10, 30, 50], [10, 30], False, [(50, 58)]),
+        ("full_height_column", [10, 30], [10, 30, 50], True, [(0, 100)]),
+    ]
+    failures = 0
+    timings: List[float] = []
+    for name, before, after, column, expected in cases:
+        previous = _band_frame(before, column)
+        current = _band_frame(after, column)
+        start = time.perf_counter()
+        try:
+            got = frame_analysis.dirty_bands(
+                frame_analysis.row_hashes(previous),
+                frame_analysis.row_hashes(current),
+                frame_analysis.row_activity(current),
+            )
+        except Exception as exc:
+            got = f"{type(exc).__name__}: {exc}"
+        timings.append((time.perf_counter() - start) * 1000.0)
+        ok = got == expected
+        failures += not ok
+        print(f"{'ok' if ok else 'FAIL':<6}{name}")
+        if not ok:
+            print(f"{'':>6}expected {expected}, got {got}")
+    report("dirty_bands", timings)
+    if failures:
+        raise SystemExit(f"{failures} of {len(cases)} cases failed")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--image", action="append", help="PNG frame to use instead of live capture")
+    common.add_argument("--frames", type=int, default=10, help="live frames to grab when no --image is given")
+    common.add_argument("--grab-interval", type=float, default=0.2, help="seconds between live grabs")
+    common.add_argument("--repeat", type=int, default=3, help="runs per frame")
+
+    parser = argparse.ArgumentParser(description="WoW Translator OCR benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser(
+        "handoff", parents=[common], help="PNG temp file vs in-memory array handoff"
+    ).set_defaults(func=bench_handoff)
+    sub.add_parser(
+        "capture", parents=[common], help="mss grabber created per tick vs kept alive"
+    ).set_defaults(func=bench_capture)
+    preprocess = sub.add_parser(
+        "preprocess", parents=[common], help="colour mask + auto-crop before OCR vs raw frame"
+    )
+    preprocess.add_argument("--contrast", type=int, default=60)
+    preprocess.add_argument("--keep-colour", action="store_true", help="mask the background but do not binarise")
+    preprocess.set_defaults(func=bench_preprocess)
+    sub.add_parser(
+        "engine", parents=[common], help="per-frame cost of each ocr.engine option"
+    ).set_defaults(func=bench_engine)
+    coarse = sub.add_parser(
+        "coarse", parents=[common], help="detection on a downscaled copy vs at capture resolution"
+    )
+    coarse.add_argument(
+        "--scale", type=float, action="append", help="ocr.detect_scale values to compare (default 1, 0.75, 0.5)"
+    )
+    coarse.add_argument("--upscale", type=float, default=1.0, help="enlarge frames first to mimic a high-DPI capture")
+    coarse.set_defaults(func=bench_coarse)
+    quantized = sub.add_parser(
+        "quantized", parents=[common], help="INT8 models from ocr_quantize.py vs the float models"
+    )
+    quantized.add_argument("--det", help="quantized detection model (default: models/ocr_int8)")
+    quantized.add_argument("--rec", help="quantized recognition model (default: models/ocr_int8)")
+    quantized.set_defaults(func=bench_quantized)
+    backends = sub.add_parser("backends", parents=[common], help="each installed OCR backend (ocr.backend)")
+    backends.add_argument("--sample", action="store_true", help="use the synthetic frame of ocr.backend = auto")
+    backends.set_defaults(func=bench_backends)
+    glyphs = sub.add_parser("glyphs", parents=[common], help="experimental ocr.glyph_cache vs neural recognition")
+    glyphs.add_argument(
+        "--learn-image", action="append", help="frame to learn glyphs from first (default: the measured frames)"
+    )
+    glyphs.add_argument("--min-votes", type=int, default=2)
+    glyphs.set_defaults(func=bench_glyphs)
+    assemble = sub.add_parser("assemble", help="message assembly regression corpus")
+    assemble.add_argument("--corpus", default=str(ASSEMBLY_CORPUS))
+    assemble.set_defaults(func=check_assembly)
+    sub.add_parser("bands", help="dirty-band detection checks").set_defaults(func=check_bands)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
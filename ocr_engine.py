@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from glyph_cache import GlyphTable, GlyphWord
+from ocr_stats import PipelineStats
+
+logger = logging.getLogger(__name__)
+
+# (quad box, text, score), the same shape RapidOCR returns per detected line.
+OcrResult = Tuple[list, str, float]
+# (image or image path, line boxes or None to run the detector), see ``OcrEngine.run_batch``.
+OcrJob = Tuple[Any, Optional[Sequence[Tuple[int, int, int, int]]]]
+
+# RapidOCR keyword arguments exposed as ``ocr.engine``. Chat text is always upright,
+# so the angle classifier is off; detection scales the longer side down to 960 px
+# instead of scaling the shorter side up to 736, which blows thin regions up.
+# Empty model paths select the float models bundled with RapidOCR; see
+# ocr_quantize.py for INT8 replacements.
+ENGINE_DEFAULTS: Dict[str, Any] = {
+    "use_cls": False,
+    "det_limit_type": "max",
+    "det_limit_side_len": 960,
+    "rec_batch_num": 6,
+    "intra_op_num_threads": -1,
+    "inter_op_num_threads": -1,
+    "det_model_path": "",
+    "rec_model_path": "",
+}
+
+
+def engine_options(options: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    """Merge ``ocr.engine`` settings over ``ENGINE_DEFAULTS``, ready for ``RapidOCR(**options)``."""
+    merged = dict(ENGINE_DEFAULTS)
+    for key, value in (options or {}).items():
+        default = ENGINE_DEFAULTS.get(key)
+        if default is None:
+            logger.warning("Ignoring unknown ocr.engine option %r", key)
+            continue
+        try:
+            merged[key] = _parse_bool(value) if isinstance(default, bool) else type(default)(value)
+        except (TypeError, ValueError):
+            logger.warning("Invalid ocr.engine.%s %r, using %r", key, value, default)
+    if merged["det_limit_type"] not in ("max", "min"):
+        logger.warning("Invalid ocr.engine.det_limit_type %r, using 'max'", merged["det_limit_type"])
+        merged["det_limit_type"] = "max"
+    for key in ("det_model_path", "rec_model_path"):
+        if merged[key] and not Path(merged[key]).is_file():
+            logger.warning("ocr.engine.%s %r not found, using the bundled model", key, merged[key])
+            merged[key] = ""
+    return merged
+
+
+def _parse_bool(value: Any) -> bool:
+    # bool("false") is True, so strings and numbers are read explicitly.
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "1"):
+        return True
+    if text in ("false", "0"):
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+class LineCache:
+    """Bounded LRU map from a line crop's pixel hash to its recognised ``(text, score)``."""
+
+    def __init__(self, capacity: int = 512) -> None:
+        self.capacity = max(int(capacity), 0)
+        self._entries: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(crop: np.ndarray) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.asarray(crop.shape, dtype=np.int32).tobytes())
+        digest.update(np.ascontiguousarray(crop).data)
+        return digest.digest()
+
+    def get(self, key: bytes) -> Optional[Tuple[str, float]]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: bytes, value: Tuple[str, float]) -> None:
+        if not self.capacity:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class OcrEngine:
+    """Run an OCR backend's detection and recognition as separate steps.
+
+    ``backend`` is one of the ``ocr_backends`` classes.
+
+    Splitting the pipeline lets recognition skip line crops whose exact pixels were
+    already recognised (see ``LineCache``); in a chat box most lines survive from
+    one frame to the next. Lines scoring below ``retry_below`` are recognised once
+    more from a crop upscaled by ``retry_scale`` and keep the better reading; 0
+    disables the retry.
+
+    With ``detect_scale`` below 1 the detector sees a downscaled copy of the image,
+    while line crops are always cut from the full-resolution original. With a
+    ``glyph_table``, lines missing from the line cache are first read glyph by
+    glyph (experimental). Not thread-safe: use one engine per worker thread.
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        *,
+        line_cache_size: int = 512,
+        retry_below: float = 0.0,
+        retry_scale: float = 2.0,
+        detect_scale: float = 1.0,
+        glyph_table: Optional[GlyphTable] = None,
+        stats: Optional[PipelineStats] = None,
+    ) -> None:
+        self.backend = backend
+        self.glyphs = glyph_table
+        self.detect_scale = min(max(float(detect_scale), 0.1), 1.0)
+        self.line_cache = LineCache(line_cache_size)
+        self.retry_below = float(retry_below)
+        self.retry_scale = max(float(retry_scale), 1.0)
+        self.stats = stats or PipelineStats()
+
+    def __call__(self, image: Any) -> List[OcrResult]:
+        return self.run_batch([(image, None)])[0]
+
+    def run_batch(self, jobs: Sequence[OcrJob]) -> List[List[OcrResult]]:
+        """OCR several images with a single recognition call over all their line crops.
+
+        Each job is ``(image, boxes)``: with ``boxes`` of ``(left, top, right, bottom)``
+        the lines are taken as given, with ``None`` they are found by the detector.
+        """
+        quads: List[List[list]] = []
+        crops: List[np.ndarray] = []
+        for image, boxes in jobs:
+            if boxes is None:
+                job_quads, job_crops = self._detect(image)
+            else:
+                job_quads = [
+                    [[left, top], [right, top], [right, bottom], [left, bottom]]
+                    for left, top, right, bottom in boxes
+                ]
+                job_crops = [
+                    np.ascontiguousarray(image[top:bottom, left:right]) for left, top, right, bottom in boxes
+                ]
+            quads.append(job_quads)
+            crops.extend(job_crops)
+
+        recognised = iter(self.recognize(crops))
+        floor = self.backend.text_score
+        results: List[List[OcrResult]] = []
+        for job_quads in quads:
+            pairs = [(quad, next(recognised)) for quad in job_quads]
+            results.append([(quad, text, score) for quad, (text, score) in pairs if score >= floor])
+        return results
+
+    def _detect(self, image: Any) -> Tuple[List[list], List[np.ndarray]]:
+        """Detected line quads in image coordinates and their (upright) crops."""
+        backend = self.backend
+        original = backend.load_image(image)
+        img = original
+        scale = self.detect_scale
+        if scale < 1.0:
+            import cv2  # shipped with the OCR backends
+
+            with self.stats.timed("detect_downscale"):
+                img = cv2.resize(original, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        with self.stats.timed("detect"):
+            points = backend.detect(img)
+        if not len(points):
+            return [], []
+
+        if scale < 1.0:
+            full_h, full_w = original.shape[:2]
+            points = points / scale
+            points[..., 0] = np.clip(points[..., 0], 0, full_w)
+            points[..., 1] = np.clip(points[..., 1], 0, full_h)
+        points = points.astype(np.float32)
+        crops = backend.crop(original, points)
+        if backend.use_cls:
+            with self.stats.timed("classify"):
+                crops = backend.classify(crops)
+        return [box.tolist() for box in points], crops
+
+    def warm_up(self) -> None:
+        """Run each model once on a blank image so the first real frame skips session setup."""
+        blank = np.full((64, 320, 3), 255, dtype=np.uint8)
+        with self.stats.timed("engine_warmup"):
+            self.backend.detect(blank)
+            if self.backend.use_cls:
+                self.backend.classify([blank[:48]])
+            self.backend.recognize([blank[:48]])
+
+    def recognize_boxes(
+        self, image: np.ndarray, boxes: Sequence[Tuple[int, int, int, int]]
+    ) -> List[OcrResult]:
+        """Recognise axis-aligned ``(left, top, right, bottom)`` line boxes without detection."""
+        return self.run_batch([(image, boxes)])[0]
+
+    def recognize(self, crops: Sequence[np.ndarray]) -> List[Tuple[str, float]]:
+        """Recognise line crops, batching only the ones missing from the line cache."""
+        results: List[Optional[Tuple[str, float]]] = [None] * len(crops)
+        keys = [LineCache.key(crop) for crop in crops]
+        missing: List[int] = []
+        for index, key in enumerate(keys):
+            cached = self.line_cache.get(key)
+            if cached is None:
+                missing.append(index)
+            else:
+                results[index] = cached
+        self.stats.incr("line_cache_hits", len(crops) - len(missing))
+        self.stats.incr("line_cache_misses", len(missing))
+
+        if missing:
+            if self.glyphs is None:
+                recognised = self._recognize_neural([crops[index] for index in missing])
+                for index, item in zip(missing, recognised):
+                    results[index] = item
+            else:
+                self._recognize_with_glyphs(crops, missing, results)
+            for index in missing:
+                self.line_cache.put(keys[index], results[index])
+        return [item or ("", 0.0) for item in results]
+
+    def close(self) -> None:
+        if self.glyphs is not None:
+            self.glyphs.save()
+
+    def _recognize_neural(self, crops: Sequence[np.ndarray]) -> List[Tuple[str, float]]:
+        if not crops:
+            return []
+        self.stats.incr("recognize_batches", -(-len(crops) // self.backend.batch_size))
+        with self.stats.timed("recognize_lines"):
+            results = list(self.backend.recognize(crops))
+        retry = [index for index, (_, score) in enumerate(results) if score < self.retry_below]
+        if retry and self.retry_scale > 1.0:
+            self._rerecognize(crops, results, retry)
+        return results
+
+    def _recognize_with_glyphs(
+        self,
+        crops: Sequence[np.ndarray],
+        indices: Sequence[int],
+        results: List[Optional[Tuple[str, float]]],
+    ) -> None:
+        """Read lines from the glyph table; lines with any unknown glyph go to the recogniser.
+
+        Unknown lines are recognised whole, since single words cropped out of a
+        line lose the context the recogniser needs. Every confident reading is
+        fed back into the table.
+        """
+        glyphs = self.glyphs
+        pending: List[int] = []
+        line_words: Dict[int, List[GlyphWord]] = {}
+        with self.stats.timed("glyph_lookup"):
+            for index in indices:
+                words = glyphs.segment(crops[index]) or []
+                text = glyphs.read_line(words) if words else None
+                if text is not None:
+                    results[index] = (text, 1.0)
+                    self.stats.incr("glyph_lines")
+                else:
+                    pending.append(index)
+                    line_words[index] = words
+
+        recognised = self._recognize_neural([crops[index] for index in pending])
+        for index, (text, score) in zip(pending, recognised):
+            results[index] = (text, score)
+            if line_words[index]:
+                glyphs.learn(line_words[index], text, score)
+
+    def _rerecognize(
+        self,
+        crops: Sequence[np.ndarray],
+        results: List[Optional[Tuple[str, float]]],
+        indices: Sequence[int],
+    ) -> None:
+        """Recognise low-scoring crops again at ``retry_scale``; keep whichever reading scores higher.
+
+        The recogniser resizes every crop to a fixed height with bilinear filtering,
+        which smears the small glyphs of chat text; a bicubic upscale first keeps
+        strokes and word gaps sharper.
+        """
+        import cv2  # shipped with the OCR backends
+
+        scale = self.retry_scale
+        scaled = [
+            cv2.resize(crops[index], None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+            for index in indices
+        ]
+        self.stats.incr("rerecognized_lines", len(indices))
+        with self.stats.timed("rerecognize_lines"):
+            recognised = self.backend.recognize(scaled)
+        for index, (text, score) in zip(indices, recognised):
+            if score > results[index][1]:
+                results[index] = (text, score)
+                self.stats.incr("rerecognize_improved")
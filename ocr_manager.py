@@ -2,22 +2,39 @@
 from __future__ import annotations
 
 import concurrent.futures
+import logging
+from collections import OrderedDict
+import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Tuple, TYPE_CHECKING
-import hashlib
-
-import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING, Union
 
 from PySide6 import QtCore, QtGui, QtWidgets
 import mss
 from mss import tools
-
-try:
-    from rapidocr_onnxruntime import RapidOCR
-except ImportError:  # pragma: no cover - optional dependency
-    RapidOCR = None
-
+import numpy as np
+
+from chat_channels import ChannelFilter, line_colour
+from chat_messages import (
+    ChatMessage,
+    MessageAssembler,
+    OcrSegment,
+    RepeatTracker,
+    fingerprint,
+    match_messages,
+    message_key,
+    new_posts,
+)
 from config_manager import ConfigManager
+import frame_analysis
+from glyph_cache import GlyphTable
+# The backend's OCR library (and onnxruntime or paddle with it) is imported on the
+# engine thread, see ``OcrController.warm_up``; only check here that one is installed.
+from ocr_backends import BACKEND_CHOICES, available_backends, choose_backend, create_backend
+from ocr_engine import OcrEngine, engine_options
+from ocr_stats import PipelineStats
+from ocr_worker import ProcessOcrEngine
 from translator import QwenTranslator
 from ui import OcrRegionOverlay
 
@@ -25,124 +42,124 @@ if TYPE_CHECKING:
     from prompt_manager import PromptManager
     from config_manager import GlossaryManager
 
-_WHITESPACE_RE = re.compile(r"\s+")
-_OPEN_PUNCT = ("(", "[", "{", "\uFF08", "\u3010", "\u300A")
-_CLOSE_PUNCT = (")", "]", "}", "\uFF09", "\u3011", "\u300B")
-CHANNEL_NAMES = (
-    "general",
-    "trade",
-    "localdefense",
-    "lookingforgroup",
-    "lfg",
-    "world",
-    "guild",
-    "party",
-    "raid",
-    "officer",
-    "instance",
-    "bg",
-    "arena",
-    "综合",
-    "交易",
-    "公会",
-    "队伍",
-    "团队",
-    "本地防务",
-    "系统",
-)
-SYSTEM_PREFIXES = (
-    "you are now",
-    "你获得",
-    "你拾取",
-    "你失去",
-    "你学会",
-    "任务",
-    "系统",
-    "声望",
-    "成就",
-)
-CHANNEL_PATTERN = "|".join(re.escape(name) for name in CHANNEL_NAMES)
-SYSTEM_PREFIX_PATTERN = "|".join(re.escape(prefix) for prefix in SYSTEM_PREFIXES)
-CHANNEL_TAG_RE = re.compile(
-    rf"^\[\s*(\d{{1,2}}\.\s*)?(?:{CHANNEL_PATTERN})\b",
-    re.IGNORECASE,
-)
-PLAYER_TAG_RE = re.compile(r"^\[[^\]]+\]\s*[^:：]{0,32}[:：]", re.IGNORECASE)
-SYSTEM_PREFIX_RE = re.compile(
-    rf"^(you(?:'ve)?\s+(?:receive|received|loot|gain|lose|learn|create|roll)|{SYSTEM_PREFIX_PATTERN})",
-    re.IGNORECASE,
-)
-NAME_COLON_RE = re.compile(r'^[^\s\[\]<>]{2,24}[:：]')
-
-
-def _normalize_ocr_segment(raw: str) -> str:
-    if not raw:
-        return ""
-    s = raw.replace("\u3000", " ").strip()
-    if not s:
-        return ""
-    s = _WHITESPACE_RE.sub(" ", s)
-    for punct in _CLOSE_PUNCT:
-        s = s.replace(f" {punct}", punct)
-    for punct in _OPEN_PUNCT:
-        s = s.replace(f"{punct} ", punct)
-    for mark in (",", ".", ";", ":", "!", "?", "\uFF0C", "\u3002", "\uFF1B", "\uFF1A", "\uFF01", "\uFF1F", "\u3001"):
-        s = s.replace(f" {mark}", mark)
-    return s.strip()
-
-
-def _strip_channel_prefix(text: str) -> str:
-    stripped = text.lstrip()
-    if not stripped.startswith("["):
-        return stripped
-    closing = stripped.find("]")
-    if closing <= 0:
-        return stripped
-    return stripped[closing + 1 :].lstrip()
-
-
-def _is_new_message(text: str) -> bool:
-    stripped = text.strip()
-    if not stripped:
-        return False
-    if CHANNEL_TAG_RE.match(stripped):
-        return True
-    if PLAYER_TAG_RE.match(stripped):
-        return True
-    if SYSTEM_PREFIX_RE.match(stripped):
-        return True
-    if NAME_COLON_RE.match(stripped):
-        return True
-    return False
-
-
-
-    if stripped.startswith("["):
-        closing = stripped.find("]")
-        if closing > 0:
-            tag = stripped[1:closing].strip()
-            if tag:
-                lower_tag = tag.lower()
-                if lower_tag and lower_tag[0].isdigit():
-                    return True
-                base = lower_tag.split()[0].strip(".:[]")
-                if base in _CHANNEL_KEYWORDS:
-                    return True
-
-    lower = stripped.lower()
-    for prefix in _PREFIX_KEYWORDS:
-        if lower.startswith(prefix):
-            return True
-
-    remainder = _strip_channel_prefix(stripped)
-    colon_pos = remainder.find(":")
-    if 0 <= colon_pos <= 32:
-        return True
-    cn_colon_pos = remainder.find("：")
-    if 0 <= cn_colon_pos <= 32:
-        return True
+logger = logging.getLogger(__name__)
 
-    return False
+# Dirty bands covering more than this share of the region are OCR'd as one full pass.
+_FULL_PASS_RATIO = 0.6
+# Extra rows of context kept around each dirty band so glyph edges are not clipped.
+_BAND_PADDING = 3
+# How the OCR stage reuses the previous frame: not at all, unchanged bands, or
+# unchanged bands after compensating for chat scrolling.
+REUSE_MODES = ("off", "bands", "scroll")
+# "detect" finds lines with the engine's detector; "fixed" cuts them from the row
+# profile of the fixed-height chat font and falls back to the detector when irregular.
+LINE_MODES = ("detect", "fixed")
+# Name of the interactively selected region; further regions come from ``ocr.regions``.
+MAIN_REGION = "main"
+# Translations kept by message text for messages that scroll back into view or repeat.
+_TRANSLATION_CACHE_SIZE = 256
+# Messages preceding a new one that go to the translator as context.
+_CONTEXT_MESSAGES = 3
+# Seconds a message whose translation failed waits before it is requested again.
+_RETRY_BACKOFF = 30.0
+
+
+@dataclass
+class CapturedFrame:
+    """A grabbed region: BGRA pixels viewing the mss buffer plus per-scanline hashes.
+
+    ``dump_path`` is set when ``ocr.debug_dump_frames`` wrote the frame to a PNG,
+    in which case the engine reads that file instead of the array.
+    """
+
+    pixels: np.ndarray
+    row_hashes: np.ndarray
+    dump_path: Optional[str] = None
+    region: str = MAIN_REGION
+    # perf_counter() at grab time, the start of the first_message_visible latency.
+    captured_at: float = field(default_factory=time.perf_counter)
+
+
+@dataclass
+class _RegionState:
+    """What the OCR stage remembers about one region between frames."""
+
+    rows: Optional[np.ndarray] = None
+    segments: List[OcrSegment] = field(default_factory=list)
+    assembler: MessageAssembler = field(default_factory=MessageAssembler)
+    # Every message of the last frame, translated or not, for matching and repeat counting.
+    messages: List[ChatMessage] = field(default_factory=list)
+    # Translation of each of ``messages`` by message id; untranslated ones are left out.
+    translations: Dict[str, str] = field(default_factory=dict)
+    repeats: Optional[RepeatTracker] = None
+
+
+@dataclass
+class _OcrSlice:
+    """One engine job: an image cut from a region frame plus where its results belong.
+
+    Only results whose centre falls inside ``band`` are kept; ``None`` keeps all.
+    """
+
+    image: Union[np.ndarray, str]
+    boxes: Optional[List[frame_analysis.Rect]]
+    left: int
+    top: int
+    band: Optional[frame_analysis.Band] = None
+
+
+@dataclass
+class _RegionPass:
+    """The planned OCR work for one region frame: segments kept as-is plus slices to run."""
+
+    frame: CapturedFrame
+    kept: List[OcrSegment]
+    slices: List[_OcrSlice]
+    full: bool
+
+
+def _has_chinese(text: str) -> bool:
+    return any('\u4e00' <= ch <= '\u9fff' for ch in text)
+
+
+def _frame_from_shot(shot: "mss.screenshot.ScreenShot") -> np.ndarray:
+    """Wrap the raw BGRA buffer of an mss screenshot as an (h, w, 4) array without copying."""
+    return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+
+def _engine_input(pixels: np.ndarray) -> np.ndarray:
+    # RapidOCR treats 4-channel arrays as RGBA with transparency; hand it a BGR view instead.
+    if pixels.ndim == 3 and pixels.shape[2] == 4:
+        return pixels[:, :, :3]
+    return pixels
+
+
+def _discard_frame(frame: CapturedFrame) -> None:
+    if not frame.dump_path:
+        return
+    try:
+        Path(frame.dump_path).unlink(missing_ok=True)
+    except Exception:
+        pass
+
+
+def _segments_from_result(
+    result: Optional[list], offset_x: float = 0.0, offset_y: float = 0.0
+) -> List[OcrSegment]:
+    segments: List[OcrSegment] = []
+    for box, text, score in result or ():
+        if not text:
+            continue
+        xs = [point[0] for point in box]
+        ys = [point[1] for point in box]
+        segments.append(
+            OcrSegment(
+                (min(xs) + offset_x, min(ys) + offset_y, max(xs) + offset_x, max(ys) + offset_y),
+                text,
+                float(score),
+            )
+        )
+    return segments
 
 
 class OcrSelectionOverlay(QtWidgets.QWidget):
@@ -223,44 +240,443 @@ class OcrSelectionOverlay(QtWidgets.QWidget):
             painter.drawRect(self._current)
 
 
+class AdaptiveInterval:
+    """Capture period that tightens while the chat keeps changing and backs off when idle.
+
+    Each changed frame multiplies the period by ``speedup``; each unchanged frame
+    multiplies it by ``backoff``. The period stays within ``[minimum, maximum]`` and
+    never drops below the recent OCR + translation latency: grabbing faster than
+    frames are consumed only replaces the frame waiting in the mailbox.
+    Times are in seconds; safe to use from the capture and OCR threads.
+    """
+
+    def __init__(
+        self,
+        initial: float,
+        minimum: float,
+        maximum: float,
+        *,
+        backoff: float = 1.5,
+        speedup: float = 0.5,
+    ) -> None:
+        self.minimum = max(float(minimum), 0.05)
+        self.maximum = max(float(maximum), self.minimum)
+        self.backoff = max(float(backoff), 1.0)
+        self.speedup = min(max(float(speedup), 0.0), 1.0)
+        self._lock = threading.Lock()
+        self._period = self._clamp(initial)
+        self._latency = 0.0
+
+    @classmethod
+    def fixed(cls, period: float) -> "AdaptiveInterval":
+        return cls(period, period, period)
+
+    def _clamp(self, value: float) -> float:
+        return min(max(float(value), self.minimum), self.maximum)
+
+    def record_frame(self, changed: bool) -> None:
+        with self._lock:
+            factor = self.speedup if changed else self.backoff
+            self._period = self._clamp(self._period * factor)
+
+    def record_latency(self, seconds: float) -> None:
+        """Feed the time one frame spent in OCR and translation (exponential average)."""
+        with self._lock:
+            self._latency = seconds if not self._latency else 0.7 * self._latency + 0.3 * seconds
+
+    def reset(self) -> None:
+        """Poll at the fastest rate again, e.g. after a new region was selected."""
+        with self._lock:
+            self._period = self.minimum
+
+    def delay(self) -> float:
+        with self._lock:
+            return min(max(self._period, self._latency), self.maximum)
+
+
+class CaptureWorker:
+    """Grab the OCR regions on a dedicated thread and hand changed frames to a sink.
+
+    Each tick grabs every region; the sink is called on the capture thread with
+    ``(token, frames)`` holding the regions that changed, and returns whether it
+    accepted them. Rejected frames are not remembered, so the same content is
+    offered again on the next tick.
+
+    The mss grabber is created on, and only used by, the capture thread. It lives
+    until the screen topology changes (see ``invalidate_grabber``) or grabbing fails.
+
+    A frame counts as changed only when more than ``change_threshold`` of the cells
+    in its glyph-density thumbnail differ from the region's last accepted frame, so cursor
+    blinks and effects behind the chat box do not trigger OCR. 0 reacts to any
+    pixel change. Whether a frame changed feeds ``schedule``, which sets the wait
+    before the next grab.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[int, List[CapturedFrame]], bool],
+        schedule: AdaptiveInterval,
+        *,
+        dump_frames: bool = False,
+        change_threshold: float = 0.0,
+        stats: Optional[PipelineStats] = None,
+    ) -> None:
+        self._sink = sink
+        self.schedule = schedule
+        self._dump_frames = dump_frames
+        self._change_threshold = max(float(change_threshold), 0.0)
+        self.stats = stats or PipelineStats()
+        self._grabber: Optional[mss.base.MSSBase] = None
+        self._rebuild_grabber = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._shutdown = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._monitors: Dict[str, dict[str, int]] = {}
+        self._token = 0
+        self._last_rows: Dict[str, np.ndarray] = {}
+        self._last_thumb: Dict[str, np.ndarray] = {}
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._shutdown.clear()
+        self._thread = threading.Thread(target=self._run, name="ocr-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._shutdown.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        with self._lock:
+            self._monitors = {}
+            self._last_rows = {}
+            self._last_thumb = {}
+
+    def set_regions(self, monitors: Dict[str, Optional[dict[str, int]]], token: int) -> None:
+        """Replace the grabbed regions, keyed by name; ``None`` monitors are skipped."""
+        with self._lock:
+            self._monitors = {name: dict(monitor) for name, monitor in monitors.items() if monitor}
+            self._token = token
+            self._last_rows = {}
+            self._last_thumb = {}
+        self.schedule.reset()
+        self._wake.set()
+
+    def reset(self) -> None:
+        """Forget the last frames so the next capture is treated as changed."""
+        with self._lock:
+            self._last_rows = {}
+            self._last_thumb = {}
+
+    def trigger(self) -> None:
+        self._wake.set()
+
+    def invalidate_grabber(self) -> None:
+        """Ask the capture thread to rebuild its grabber, e.g. after a monitor or DPI change."""
+        with self._lock:
+            self._rebuild_grabber = True
+
+    def _run(self) -> None:
+        try:
+            while not self._shutdown.is_set():
+                delay = self.schedule.delay()
+                self.stats.record("capture_interval", delay)
+                self._wake.wait(delay)
+                self._wake.clear()
+                if self._shutdown.is_set():
+                    break
+                try:
+                    changed = self._tick()
+                    if changed is not None:
+                        self.schedule.record_frame(changed)
+                except Exception:  # pragma: no cover - keep the capture loop alive
+                    logger.exception("OCR capture failed")
+        finally:
+            self._close_grabber()
+
+    def _close_grabber(self) -> None:
+        if self._grabber is None:
+            return
+        try:
+            self._grabber.close()
+        except Exception:  # pragma: no cover - defensive
+            pass
+        self._grabber = None
+
+    def _grab(self, monitor: dict[str, int]) -> "mss.screenshot.ScreenShot":
+        with self._lock:
+            rebuild = self._rebuild_grabber
+            self._rebuild_grabber = False
+        if rebuild:
+            self._close_grabber()
+        if self._grabber is None:
+            with self.stats.timed("grabber_setup"):
+                self._grabber = mss.mss()
+            self.stats.incr("grabber_builds")
+        try:
+            with self.stats.timed("capture"):
+                return self._grabber.grab(monitor)
+        except mss.exception.ScreenShotError:
+            # Stale handles after a display change surface as grab errors; the next
+            # tick builds a fresh grabber.
+            self._close_grabber()
+            self.stats.incr("capture_errors")
+            raise
+
+    def _tick(self) -> Optional[bool]:
+        """Grab every region; return whether any changed, or ``None`` when nothing was grabbed."""
+        with self._lock:
+            monitors = dict(self._monitors)
+            token = self._token
+            last_rows = dict(self._last_rows)
+            last_thumb = dict(self._last_thumb)
+        grabbed = False
+        changed: List[Tuple[CapturedFrame, np.ndarray]] = []
+        for name, monitor in monitors.items():
+            try:
+                shot = self._grab(monitor)
+            except mss.exception.ScreenShotError:
+                continue
+            grabbed = True
+            frame_thumb = self._changed_frame(shot, name, last_rows.get(name), last_thumb.get(name))
+            if frame_thumb is not None:
+                changed.append(frame_thumb)
+        if not changed:
+            return False if grabbed else None
+
+        frames = [frame for frame, _ in changed]
+        if not self._sink(token, frames):
+            for frame in frames:
+                _discard_frame(frame)
+            return None
+        with self._lock:
+            if token == self._token:
+                for frame, thumb in changed:
+                    self._last_rows[frame.region] = frame.row_hashes
+                    self._last_thumb[frame.region] = thumb
+        return True
+
+    def _changed_frame(
+        self,
+        shot: "mss.screenshot.ScreenShot",
+        name: str,
+        last_rows: Optional[np.ndarray],
+        last_thumb: Optional[np.ndarray],
+    ) -> Optional[Tuple[CapturedFrame, np.ndarray]]:
+        """The frame and its ink thumbnail if it differs enough from the region's last frame."""
+        pixels = _frame_from_shot(shot)
+        with self.stats.timed("row_hash"):
+            rows = frame_analysis.row_hashes(pixels)
+        if last_rows is not None and np.array_equal(rows, last_rows):
+            self.stats.incr("frames_identical")
+            return None
+        thumb = frame_analysis.ink_thumbnail(pixels)
+        if last_thumb is not None and self._change_threshold > 0:
+            score = frame_analysis.change_score(last_thumb, thumb)
+            if score <= self._change_threshold:
+                self.stats.incr("ocr_runs_avoided")
+                return None
+        frame = CapturedFrame(pixels, rows, region=name)
+        if self._dump_frames:
+            frame.dump_path = self._dump_frame(shot, name)
+        return frame, thumb
+
+    @staticmethod
+    def _dump_frame(shot: "mss.screenshot.ScreenShot", name: str) -> Optional[str]:
+        location = QtCore.QStandardPaths.writableLocation(QtCore.QStandardPaths.TempLocation)
+        if not location:
+            return None
+        output_dir = Path(location)
+        try:
+            output_dir.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            return None
+        file_path = output_dir / f"wow_translator_{name}_{QtCore.QDateTime.currentMSecsSinceEpoch()}.png"
+        tools.to_png(shot.rgb, shot.size, output=str(file_path))
+        return str(file_path)
+
+
+# (region name, original text, translation, error) for one region of an OCR batch.
+RegionResult = Tuple[str, str, str, Optional[str]]
+
+
 class OcrController(QtCore.QObject):
-    """Coordinate OCR capture, text extraction, and translation."""
+    """Coordinate OCR capture, text extraction, and translation.
+
+    Besides the interactively selected main region, ``ocr.regions`` may name further
+    fixed regions. Changed regions are recognised together in one batched engine
+    call and each is translated on its own; ``regionTextUpdated`` carries every
+    region's result and ``textUpdated`` the main region's.
+    """
 
     textUpdated = QtCore.Signal(str, str)
+    regionTextUpdated = QtCore.Signal(str, str, str)
     statusUpdated = QtCore.Signal(str)
 
     def __init__(self, cfg: ConfigManager, translator: QwenTranslator, prompt_manager: 'PromptManager', glossary: 'GlossaryManager') -> None:
         super().__init__()
-        if RapidOCR is None:
-            raise RuntimeError("未安装 rapidocr-onnxruntime，请使用 --no-ocr 或先安装依赖")
+        installed = available_backends()
+        if not installed:
+            raise RuntimeError("未安装 rapidocr-onnxruntime 或 paddleocr，请使用 --no-ocr 或先安装依赖")
 
         self.cfg = cfg
         self.translator = translator
         self.prompt_manager = prompt_manager
         self.glossary = glossary
-        self.ocr = RapidOCR()
 
         self._active = False
         self._capture_rect: Optional[QtCore.QRect] = None
         self._capture_token = 0
         self._pending_future: Optional[
-            concurrent.futures.Future[Tuple[int, str, str, Optional[str]]]
+            concurrent.futures.Future[Tuple[int, List[RegionResult]]]
         ] = None
+        self._pending_lock = threading.Lock()
+        # Newest unprocessed frame per region, all for the token stored alongside.
+        self._mailbox: Optional[Tuple[int, Dict[str, CapturedFrame]]] = None
         self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
 
-        self._timer = QtCore.QTimer(self)
-        self._timer.setInterval(int(self.cfg.get_ocr_config().get("detection_interval", 2500)))
-        self._timer.timeout.connect(self._tick)
+        self.stats = PipelineStats()
+        ocr_cfg = self.cfg.get_ocr_config()
+        self.engine_options = engine_options(ocr_cfg.get("engine"))
+        backend = str(ocr_cfg.get("backend", "rapidocr"))
+        if backend not in BACKEND_CHOICES:
+            logger.warning("Unknown ocr.backend %r, using 'rapidocr'", backend)
+            backend = "rapidocr"
+        if backend != "auto" and backend not in installed:
+            logger.warning("OCR backend %s is not installed, using 'auto'", backend)
+            backend = "auto"
+        self._backend_name = backend
+        logger.info("OCR engine options: %s", self.engine_options)
+        self._line_cache_size = int(ocr_cfg.get("line_cache_size", 512))
+        confidence = ocr_cfg.get("confidence")
+        confidence = confidence if isinstance(confidence, dict) else {}
+        self._min_score = float(confidence.get("min_score", 0.6))
+        self._retry_below = float(confidence.get("retry_below", 0.85))
+        self._retry_scale = float(confidence.get("retry_scale", 2.0))
+        self._detect_scale = float(ocr_cfg.get("detect_scale", 1.0))
+        glyph_cfg = ocr_cfg.get("glyph_cache")
+        self._glyph_cfg: dict = glyph_cfg if isinstance(glyph_cfg, dict) else {}
+        self._channels = ChannelFilter.from_config(ocr_cfg.get("channels"))
+        repeats_cfg = ocr_cfg.get("repeats")
+        self._repeats_cfg: dict = repeats_cfg if isinstance(repeats_cfg, dict) else {}
+        # Built on the OCR executor by warm_up(); jobs queued behind it wait for the engine.
+        self.ocr: Optional[OcrEngine | ProcessOcrEngine] = None
+        worker_cfg = ocr_cfg.get("worker")
+        self._worker_cfg: dict = worker_cfg if isinstance(worker_cfg, dict) else {}
+        self._engine_error: Optional[str] = None
+        self._engine_loading: Optional[concurrent.futures.Future[None]] = None
+        self._capture_worker = CaptureWorker(
+            self._submit_frame,
+            self._build_schedule(ocr_cfg),
+            dump_frames=bool(ocr_cfg.get("debug_dump_frames", False)),
+            change_threshold=float(ocr_cfg.get("change_threshold", 0.003) or 0.0),
+            stats=self.stats,
+        )
+        self._watch_screens()
 
         self.selection_overlay: Optional[OcrSelectionOverlay] = None
         self.overlay: Optional[OcrRegionOverlay] = None
 
         self._pass_through = False
-        self._last_capture_hash: Optional[str] = None
         self.last_text: str = ""
         self._last_translation: str = ""
+        # Capture time of the newest batch with a partial result, and of the one
+        # whose first new translation is still waiting to be drawn.
+        self._progress_frame = 0.0
+        self._awaiting_shown: Optional[float] = None
+
+        # Previous-frame state of the OCR stage; only touched on the executor thread.
+        self._reuse_mode = "scroll"
+        self.set_reuse_mode(str(ocr_cfg.get("reuse_mode", "scroll")))
+        self._line_mode = "detect"
+        self.set_line_mode(str(ocr_cfg.get("line_mode", "detect")))
+        preprocess = ocr_cfg.get("preprocess")
+        self._preprocess: dict = preprocess if isinstance(preprocess, dict) else {}
+        self._ocr_token = -1
+        self._region_states: Dict[str, _RegionState] = {}
+        self._translation_cache: "OrderedDict[str, str]" = OrderedDict()
+        # message_key -> monotonic time before which a failed message is not sent again.
+        self._retry_after: Dict[str, float] = {}
+        # Offers the regions again when backed-off messages are due, as an idle chat
+        # box would not produce another frame by itself.
+        self._retry_timer = QtCore.QTimer(self)
+        self._retry_timer.setSingleShot(True)
+        self._retry_timer.timeout.connect(self._retry_backed_off)
+        self._extra_regions = self._load_extra_regions()
+
+    @staticmethod
+    def _build_schedule(ocr_cfg: dict) -> AdaptiveInterval:
+        interval = int(ocr_cfg.get("detection_interval", 2500)) / 1000.0
+        schedule_cfg = ocr_cfg.get("schedule")
+        if not isinstance(schedule_cfg, dict) or not schedule_cfg.get("adaptive", True):
+            return AdaptiveInterval.fixed(interval)
+        return AdaptiveInterval(
+            interval,
+            int(schedule_cfg.get("min_interval", 500)) / 1000.0,
+            int(schedule_cfg.get("max_interval", 8000)) / 1000.0,
+            backoff=float(schedule_cfg.get("backoff", 1.5)),
+            speedup=float(schedule_cfg.get("speedup", 0.5)),
+        )
+
+    def warm_up(self) -> None:
+        """Load and warm up the OCR engine in the background; later calls do nothing."""
+        with self._pending_lock:
+            if self._engine_loading is None:
+                self._engine_loading = self._executor.submit(self._load_engine)
+
+    def _load_engine(self) -> None:
+        try:
+            with self.stats.timed("engine_load"):
+                backend = self._backend_name
+                if backend == "auto":
+                    backend = choose_backend(self.engine_options)
+                logger.info("OCR backend: %s", backend)
+                if self._worker_cfg.get("enabled", False):
+                    engine = ProcessOcrEngine(
+                        self.engine_options,
+                        backend=backend,
+                        line_cache_size=self._line_cache_size,
+                        retry_below=self._retry_below,
+                        retry_scale=self._retry_scale,
+                        detect_scale=self._detect_scale,
+                        glyph_cache=self._glyph_cfg,
+                        slots=int(self._worker_cfg.get("slots", 2)),
+                        timeout=float(self._worker_cfg.get("timeout", 30)),
+                        stats=self.stats,
+                    )
+                else:
+                    engine = OcrEngine(
+                        create_backend(backend, self.engine_options),
+                        line_cache_size=self._line_cache_size,
+                        retry_below=self._retry_below,
+                        retry_scale=self._retry_scale,
+                        detect_scale=self._detect_scale,
+                        glyph_table=GlyphTable.from_config(self._glyph_cfg),
+                        stats=self.stats,
+                    )
+            engine.warm_up()
+        except Exception as exc:
+            logger.warning("OCR engine failed to load: %s", exc, exc_info=True)
+            self._engine_error = f"OCR 引擎加载失败：{exc}"
+            QtCore.QMetaObject.invokeMethod(
+                self,
+                "_emit_status",
+                QtCore.Qt.QueuedConnection,
+                QtCore.Q_ARG(str, self._engine_error),
+            )
+            return
+        self.ocr = engine
+        logger.info(
+            "OCR engine loaded in %.0f ms, warm-up %.0f ms",
+            self.stats.average_ms("engine_load"),
+            self.stats.average_ms("engine_warmup"),
+        )
 
     def start(self) -> None:
+        self.warm_up()
         if self._active:
             return
         region = self._load_region()
@@ -277,20 +693,47 @@ class OcrController(QtCore.QObject):
         if self.overlay:
             self.overlay.close()
             self.overlay = None
-        if self._pending_future:
-            self._pending_future.cancel()
-            self._pending_future = None
-        self._timer.stop()
+        self._capture_worker.stop()
+        self._retry_timer.stop()
+        self._cancel_pending()
+        if self._active:
+            logger.info("OCR stats: %s", self.stats.summary())
         self._active = False
         self._pass_through = False
         self._capture_rect = None
         self._capture_token += 1
-        self._last_capture_hash = None
+        self._awaiting_shown = None
         self.statusUpdated.emit("OCR 已停止")
 
+    def shutdown(self) -> None:
+        """Stop OCR for good without waiting for the job in progress.
+
+        That job may be a translation request, the backend benchmark or a model
+        download. A worker process is ended right away, which also fails the
+        request the OCR thread may be waiting on.
+        """
+        self.stop()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.ocr is not None:
+            self.ocr.close()
+
     def is_active(self) -> bool:
         return self._active
 
+    def set_reuse_mode(self, mode: str) -> None:
+        """Select how much of the previous frame's OCR result is reused, see ``REUSE_MODES``."""
+        if mode not in REUSE_MODES:
+            logger.warning("Unknown OCR reuse_mode %r, keeping %r", mode, self._reuse_mode)
+            return
+        self._reuse_mode = mode
+
+    def set_line_mode(self, mode: str) -> None:
+        """Select how text lines are located before recognition, see ``LINE_MODES``."""
+        if mode not in LINE_MODES:
+            logger.warning("Unknown OCR line_mode %r, keeping %r", mode, self._line_mode)
+            return
+        self._line_mode = mode
+
     def _show_selection_overlay(self) -> None:
         overlay = OcrSelectionOverlay()
         overlay.selectionMade.connect(self._handle_selection)
@@ -309,15 +752,15 @@ class OcrController(QtCore.QObject):
             self.statusUpdated.emit("OCR inactive; cannot hide region")
             return self._pass_through
         self._pass_through = not self._pass_through
-        self._last_capture_hash = None
+        self._capture_worker.reset()
         if self.overlay:
             self.overlay.set_pass_through(self._pass_through)
             if not self._pass_through:
                 self.overlay.raise_()
-        if self._active and not self._timer.isActive():
-            self._timer.start()
+        if self._active:
+            self._capture_worker.start()
         if not self._pass_through:
-            self._tick()
+            self._capture_worker.trigger()
             self.statusUpdated.emit("Overlay restored; windows interactive")
         else:
             self.statusUpdated.emit("Overlay hidden; OCR running in background")
@@ -331,10 +774,7 @@ class OcrController(QtCore.QObject):
     def _activate_with_region(self, rect: QtCore.QRect) -> None:
         self._capture_rect = QtCore.QRect(rect)
         self._capture_token += 1
-        self._last_capture_hash = None
-        if self._pending_future:
-            self._pending_future.cancel()
-            self._pending_future = None
+        self._cancel_pending()
         if self.overlay:
             self.overlay.close()
 
@@ -352,48 +792,108 @@ class OcrController(QtCore.QObject):
         self.statusUpdated.emit("OCR active")
         self.last_text = ""
         self._last_translation = ""
-        self._timer.start()
-        self._tick()
+        self._capture_worker.set_regions(self._region_monitors(), self._capture_token)
+        self._capture_worker.start()
 
     def _handle_region_change(self, rect: QtCore.QRect) -> None:
         self._capture_rect = QtCore.QRect(rect)
         self._save_region(rect)
         self._capture_token += 1
-        self._last_capture_hash = None
-        if self._pending_future:
-            self._pending_future.cancel()
-            self._pending_future = None
+        self._cancel_pending()
         self.last_text = ""
         self._last_translation = ""
         self.statusUpdated.emit("识别区域已更新，重新识别中…")
-        self._timer.start()
-        self._tick()
+        self._capture_worker.set_regions(self._region_monitors(), self._capture_token)
+        self._capture_worker.start()
 
-    def _tick(self) -> None:
-        if not self._capture_rect or self._pending_future is not None:
-            return
-        path = self._capture(self._capture_rect)
-        if not path:
+    def _watch_screens(self) -> None:
+        app = QtGui.QGuiApplication.instance()
+        if app is None:
             return
-        token = self._capture_token
+        app.screenAdded.connect(self._handle_screen_added)
+        app.screenRemoved.connect(self._handle_screen_topology_changed)
+        app.primaryScreenChanged.connect(self._handle_screen_topology_changed)
+        for screen in app.screens():
+            self._watch_screen(screen)
+
+    def _watch_screen(self, screen: QtGui.QScreen) -> None:
+        screen.geometryChanged.connect(self._handle_screen_topology_changed)
+        screen.logicalDotsPerInchChanged.connect(self._handle_screen_topology_changed)
+        screen.physicalDotsPerInchChanged.connect(self._handle_screen_topology_changed)
+
+    def _handle_screen_added(self, screen: QtGui.QScreen) -> None:
+        self._watch_screen(screen)
+        self._handle_screen_topology_changed()
+
+    def _handle_screen_topology_changed(self, *_args: object) -> None:
+        self._capture_worker.invalidate_grabber()
+        if self._active and self._capture_rect:
+            # Logical-to-native mapping depends on the screen's scale, so recompute it.
+            self._capture_worker.set_regions(self._region_monitors(), self._capture_token)
+
+    def _cancel_pending(self) -> None:
+        with self._pending_lock:
+            future = self._pending_future
+            self._pending_future = None
+            waiting = self._mailbox
+            self._mailbox = None
+        if future:
+            future.cancel()
+        if waiting:
+            for frame in waiting[1].values():
+                _discard_frame(frame)
+
+    def _submit_frame(self, token: int, frames: List[CapturedFrame]) -> bool:
+        # Runs on the capture thread. The mailbox holds only the newest frame per region:
+        # a frame still waiting when a newer one of its region arrives is dropped, never
+        # OCR'd late; waiting frames of other regions stay.
+        with self._pending_lock:
+            if token != self._capture_token:
+                return False
+            if self._mailbox is None or self._mailbox[0] != token:
+                self._mailbox = (token, {})
+            waiting = self._mailbox[1]
+            superseded = [waiting[frame.region] for frame in frames if frame.region in waiting]
+            waiting.update((frame.region, frame) for frame in frames)
+        if superseded:
+            self.stats.incr("frames_superseded", len(superseded))
+            for frame in superseded:
+                _discard_frame(frame)
+        self._schedule_ocr()
+        return True
 
-        def job() -> Tuple[int, str, str, Optional[str]]:
-            original, translation, error = self._perform_ocr(path)
-            return token, original, translation, error
+    def _schedule_ocr(self) -> None:
+        """Start OCR on the mailbox frames unless a job is already running."""
+        with self._pending_lock:
+            if self._pending_future is not None or self._mailbox is None:
+                return
+            token, waiting = self._mailbox
+            self._mailbox = None
+            frames = list(waiting.values())
+            if token != self._capture_token:
+                stale = frames
+                future = None
+            else:
+                stale = []
+
+                def job() -> Tuple[int, List[RegionResult]]:
+                    return token, self._perform_ocr(token, frames)
 
-        future = self._executor.submit(job)
-        self._pending_future = future
-        future.add_done_callback(self._handle_future_result)
+                future = self._executor.submit(job)
+                self._pending_future = future
+        for frame in stale:
+            _discard_frame(frame)
+        if future is not None:
+            future.add_done_callback(self._handle_future_result)
 
     def _handle_future_result(
         self,
-        future: concurrent.futures.Future[Tuple[int, str, str, Optional[str]]],
+        future: concurrent.futures.Future[Tuple[int, List[RegionResult]]],
     ) -> None:
         try:
-            token, original, translation, error = future.result()
+            token, results = future.result()
         except Exception as exc:
-            if self._pending_future is future:
-                self._pending_future = None
+            self._release_pending(future)
             QtCore.QMetaObject.invokeMethod(
                 self,
                 "_emit_status",
@@ -402,140 +902,507 @@ class OcrController(QtCore.QObject):
             )
             return
 
-        if self._pending_future is future:
-            self._pending_future = None
+        self._release_pending(future)
 
         if token != self._capture_token:
             return
 
-        if error:
+        for name, original, translation, error in results:
+            if error:
+                label = "" if name == MAIN_REGION else f"[{name}] "
+                QtCore.QMetaObject.invokeMethod(
+                    self,
+                    "_emit_status",
+                    QtCore.Qt.QueuedConnection,
+                    QtCore.Q_ARG(str, f"OCR 结果：{label}{error}"),
+                )
+                continue
             QtCore.QMetaObject.invokeMethod(
                 self,
-                "_emit_status",
+                "_emit_result",
                 QtCore.Qt.QueuedConnection,
-                QtCore.Q_ARG(str, f"OCR 结果：{error}"),
+                QtCore.Q_ARG(str, name),
+                QtCore.Q_ARG(str, original),
+                QtCore.Q_ARG(str, translation),
             )
-            return
-
-        self.last_text = original
-        self._last_translation = translation
 
-        QtCore.QMetaObject.invokeMethod(
-            self,
-            "_emit_result",
-            QtCore.Qt.QueuedConnection,
-            QtCore.Q_ARG(str, translation),
-        )
+    def _release_pending(self, future: concurrent.futures.Future) -> None:
+        # Free the OCR slot and go straight on with whatever frames arrived meanwhile;
+        # with an empty mailbox, grab now rather than waiting out the capture interval.
+        with self._pending_lock:
+            if self._pending_future is not future:
+                return
+            self._pending_future = None
+            idle = self._mailbox is None
+        if idle:
+            if self._active:
+                self._capture_worker.trigger()
+        else:
+            self._schedule_ocr()
 
-    @QtCore.Slot(str)
-    def _emit_result(self, translation: str) -> None:
+    @QtCore.Slot(str, str, str)
+    def _emit_result(self, region: str, original: str, translation: str) -> None:
         if translation:
             self.statusUpdated.emit("OCR 已刷新")
         else:
             self.statusUpdated.emit("未检测到文本")
-        self.textUpdated.emit(self.last_text, translation)
+        self.regionTextUpdated.emit(region, original, translation)
+        if region == MAIN_REGION:
+            self.last_text = original
+            self._last_translation = translation
+            self.textUpdated.emit(original, translation)
+
+    @QtCore.Slot(str, str, str, float)
+    def _emit_progress(self, region: str, original: str, translation: str, captured_at: float) -> None:
+        # The first partial result of a batch starts the wait for it to be drawn.
+        if captured_at > self._progress_frame:
+            self._progress_frame = captured_at
+            self._awaiting_shown = captured_at
+        self.regionTextUpdated.emit(region, original, translation)
+
+    @QtCore.Slot(int)
+    def _start_retry_timer(self, delay_ms: int) -> None:
+        if self._active:
+            self._retry_timer.start(delay_ms)
+
+    @QtCore.Slot()
+    def _retry_backed_off(self) -> None:
+        # The next grab counts as changed; unchanged bands reuse their segments,
+        # so only the translation of the due messages is redone.
+        if self._active:
+            self._capture_worker.reset()
+            self._capture_worker.trigger()
+
+    @QtCore.Slot()
+    def mark_translation_shown(self) -> None:
+        """Called by the result window after drawing; records ``first_message_visible``."""
+        if self._awaiting_shown is not None:
+            self.stats.record("first_message_visible", time.perf_counter() - self._awaiting_shown)
+            self._awaiting_shown = None
 
     @QtCore.Slot(str)
     def _emit_status(self, text: str) -> None:
         self.statusUpdated.emit(text)
 
-    def _perform_ocr(self, path: str) -> Tuple[str, str, Optional[str]]:
+    def _perform_ocr(self, token: int, frames: List[CapturedFrame]) -> List[RegionResult]:
+        started = time.perf_counter()
         try:
-            result, _ = self.ocr(path)
-        except Exception:
-            try:
-                Path(path).unlink(missing_ok=True)
-            except Exception:
-                pass
-            return "", "", "未识别到文本"
-
+            return self._ocr_and_translate(token, frames)
+        finally:
+            self._capture_worker.schedule.record_latency(time.perf_counter() - started)
+
+    def _ocr_and_translate(self, token: int, frames: List[CapturedFrame]) -> List[RegionResult]:
+        if self.ocr is None:
+            for frame in frames:
+                _discard_frame(frame)
+            error = self._engine_error or "OCR 引擎未加载"
+            return [(frame.region, "", "", error) for frame in frames]
         try:
-            raw_segments: list[str] = []
-            if result:
-                for _, segment, _ in result:
-                    if segment:
-                        raw_segments.append(segment)
-
-            messages: list[str] = []
-            pending_fragment: str | None = None
-            for segment in raw_segments:
-                cleaned = _normalize_ocr_segment(segment)
-                if not cleaned:
-                    continue
-                if pending_fragment is not None:
-                    cleaned = f"{pending_fragment}{cleaned}"
-                    pending_fragment = None
-                if cleaned.startswith('[') and ']' not in cleaned and len(cleaned) < 24:
-                    pending_fragment = cleaned
-                    continue
-                if cleaned.startswith(']') and messages:
-                    messages[-1] = f"{messages[-1]}{cleaned}".strip()
-                    continue
-                if cleaned.startswith(':') and messages:
-                    messages[-1] = f"{messages[-1]}{cleaned}".strip()
-                    continue
-                if messages and CHANNEL_TAG_RE.match(messages[-1]) and PLAYER_TAG_RE.match(cleaned):
-                    messages[-1] = f"{messages[-1]} {cleaned}".strip()
-                    continue
-                if messages and SYSTEM_PREFIX_RE.match(cleaned) and not CHANNEL_TAG_RE.match(cleaned):
-                    messages[-1] = f"{messages[-1]} {cleaned}".strip()
-                    continue
-                if _is_new_message(cleaned) or not messages:
-                    messages.append(cleaned)
-                else:
-                    messages[-1] = f"{messages[-1]} {cleaned}".strip()
+            recognised = self._recognize(token, frames)
+        except Exception:
+            logger.debug("OCR engine failed", exc_info=True)
+            return [(frame.region, "", "", "未识别到文本") for frame in frames]
+        finally:
+            for frame in frames:
+                _discard_frame(frame)
+        captured_at = min(frame.captured_at for frame in frames)
 
-            if pending_fragment and messages:
-                messages[-1] = f"{messages[-1]} {pending_fragment}".strip()
-            elif pending_fragment:
-                messages.append(pending_fragment)
+        def publish(name: str, original: str, translation: str) -> None:
+            if token != self._capture_token:
+                return
+            QtCore.QMetaObject.invokeMethod(
+                self,
+                "_emit_progress",
+                QtCore.Qt.QueuedConnection,
+                QtCore.Q_ARG(str, name),
+                QtCore.Q_ARG(str, original),
+                QtCore.Q_ARG(str, translation),
+                QtCore.Q_ARG(float, captured_at),
+            )
 
-            text = "\n".join(messages).strip()
-            if not text:
-                return "", "", "未识别到文本"
+        return [self._translate_region(name, segments, publish) for name, segments in recognised.items()]
 
-            has_chinese = any('\u4e00' <= ch <= '\u9fff' for ch in text)
-            prompt = self.prompt_manager.get_zh_to_en_prompt() if has_chinese else self.prompt_manager.get_prompt()
-            context = self.last_text
+    def _translate_region(
+        self,
+        name: str,
+        segments: List[OcrSegment],
+        publish: Optional[Callable[[str, str, str], None]] = None,
+    ) -> RegionResult:
+        """Translate a region's messages, sending only those not seen in earlier frames.
+
+        Messages are matched against the previous frame's despite OCR noise, see
+        ``match_messages``; matched ones and repeats of recently translated text
+        keep their translation, and the result stitches old and new together.
+        New messages are translated one by one, or all in one call by a
+        translator with ``supports_batch``. After each call, ``publish``
+        receives the region's text and the translations finished so far, so
+        they can be shown before the rest.
+        The first failed request ends the frame, and its messages are not sent
+        again for ``_RETRY_BACKOFF`` seconds.
+        Messages of channels filtered out by ``ocr.channels`` are dropped first.
+        With ``ocr.repeats``, text posted several times is shown once, at its
+        newest post, with a "×N" count, see ``RepeatTracker``.
+        """
+        # Low-confidence segments (icons, half-scrolled lines, background noise) are
+        # dropped here rather than in the engine, so they stay in the region state
+        # for reuse and can be counted.
+        confident = [segment for segment in segments if segment.score >= self._min_score]
+        dropped = len(segments) - len(confident)
+        if dropped:
+            self.stats.incr("low_confidence_segments", dropped)
+        state = self._region_states[name]
+        with self.stats.timed("assemble"):
+            messages = state.assembler(confident)
+        if not messages:
+            self._count_idle_frame(dropped)
+            return name, "", "", "未识别到文本"
+        if self._channels is not None:
+            wanted = [
+                message
+                for message in messages
+                if self._channels.allows(self._channels.classify(message.text, message.colour))
+            ]
+            if len(wanted) < len(messages):
+                self.stats.incr("channel_messages_dropped", len(messages) - len(wanted))
+                messages = wanted
+            if not messages:
+                self._count_idle_frame(dropped)
+                return name, "", "", "消息均已按频道过滤"
+        text = "\n".join(message.text for message in messages)
+        with self.stats.timed("message_diff"):
+            matches = match_messages(state.messages, messages)
+
+        fingerprints = [fingerprint(message) for message in messages]
+        counts = [1] * len(messages)
+        shown = list(range(len(messages)))
+        if state.repeats is not None:
+            # Spam: each text is shown once, where it was posted last, with how often it was.
+            now = time.monotonic()
+            posted = new_posts(state.messages, messages, matches)
+            for index, key in enumerate(fingerprints):
+                counts[index] = state.repeats.observe(key, now, posted[index])
+                if posted[index] and counts[index] > 1:
+                    self.stats.incr("messages_repeated")
+            shown = sorted({key: index for index, key in enumerate(fingerprints)}.values())
+            text = "\n".join(messages[index].text for index in shown)
+
+        resolved: List[Optional[str]] = []
+        for message, previous in zip(messages, matches):
+            translation = state.translations.get(previous.id) if previous is not None else None
+            if translation is None:
+                translation = self._translation_cache.get(message_key(message.text))
+            resolved.append(translation)
+        # Copies of one text share its translation and are sent at most once.
+        known: Dict[str, str] = {}
+        for key, translation in zip(fingerprints, resolved):
+            if translation is not None:
+                known.setdefault(key, translation)
+        resolved = [known.get(key) for key in fingerprints]
+        now = time.monotonic()
+        self._retry_after = {key: until for key, until in self._retry_after.items() if until > now}
+        pending: List[int] = []
+        queued = set()
+        for index in shown:
+            if resolved[index] is not None or fingerprints[index] in queued:
+                continue
+            queued.add(fingerprints[index])
+            if message_key(messages[index].text) in self._retry_after:
+                self.stats.incr("messages_backed_off")
+            else:
+                pending.append(index)
+        self.stats.incr("messages_reused", len(messages) - len(queued))
+        if not pending:
+            self._count_idle_frame(dropped)
+
+        def render() -> str:
+            lines = []
+            for index in shown:
+                translation = resolved[index]
+                if translation:
+                    lines.append(translation if counts[index] < 2 else f"{translation} ×{counts[index]}")
+            return "\n".join(lines)
+
+        if getattr(self.translator, "supports_batch", False):
+            # English and Chinese messages need different prompts, so they go in separate calls.
+            batches = [
+                [index for index in pending if _has_chinese(messages[index].text) == chinese]
+                for chinese in (False, True)
+            ]
+        else:
+            batches = [[index] for index in pending]
+        error: Optional[str] = None
+        for batch in batches:
+            if not batch:
+                continue
+            context = messages[max(batch[0] - _CONTEXT_MESSAGES, 0) : batch[0]]
             try:
-                translation = self.translator.translate(text, prompt, context)
+                translations = self._translate_messages(
+                    [messages[index].text for index in batch], "\n".join(item.text for item in context)
+                )
             except Exception as exc:
-                return text, "", f"翻译失败:{exc}"
-
-            if not has_chinese and self.glossary:
-                translation = self.glossary.translate(translation)
+                error = f"翻译失败:{exc}"
+                break
+            failure = next((item for item in translations if item.startswith("[ERROR]")), None)
+            if failure:
+                error = f"翻译失败:{failure}"
+                break
+            self.stats.incr("messages_translated", len(batch))
+            for index, translation in zip(batch, translations):
+                for other, key in enumerate(fingerprints):
+                    if key == fingerprints[index]:
+                        resolved[other] = translation
+            if publish is not None:
+                publish(name, text, render())
+        if error:
+            # Usually the service is failing (quota, network), not the message:
+            # hold back everything still untranslated rather than retry each frame.
+            retry_at = time.monotonic() + _RETRY_BACKOFF
+            for index in pending:
+                if resolved[index] is None:
+                    self._retry_after[message_key(messages[index].text)] = retry_at
+            QtCore.QMetaObject.invokeMethod(
+                self,
+                "_start_retry_timer",
+                QtCore.Qt.QueuedConnection,
+                QtCore.Q_ARG(int, int(_RETRY_BACKOFF * 1000) + 100),
+            )
 
-            return text, translation, None
-        finally:
+        # All messages stay for the next frame's matching, or ``new_posts`` would take
+        # the untranslated ones for fresh posts and count them again.
+        state.messages = messages
+        state.translations = {}
+        for message, translation in zip(messages, resolved):
+            if translation is None:
+                continue
+            key = message_key(message.text)
+            self._translation_cache[key] = translation
+            self._translation_cache.move_to_end(key)
+            state.translations[message.id] = translation
+        while len(self._translation_cache) > _TRANSLATION_CACHE_SIZE:
+            self._translation_cache.popitem(last=False)
+        if error:
+            return name, text, "", error
+        return name, text, render(), None
+
+    def _translate_messages(self, texts: List[str], context: str) -> List[str]:
+        """Translate ``texts``, all in one language, with one translator call.
+
+        Several texts need a translator with ``supports_batch``; it gets each as
+        its own sentence, so replies cannot merge or split across messages.
+        """
+        self.stats.incr("translation_requests")
+        if len(texts) == 1:
+            return [self._translate_message(texts[0], context)]
+        has_chinese = _has_chinese(texts[0])
+        translations = self.translator.translate_batch(texts, self._prompt(has_chinese), context)
+        if not has_chinese and self.glossary:
+            translations = [self.glossary.translate(translation) for translation in translations]
+        return translations
+
+    def _translate_message(self, text: str, context: str) -> str:
+        has_chinese = _has_chinese(text)
+        translation = self.translator.translate(text, self._prompt(has_chinese), context)
+        if not has_chinese and self.glossary:
+            translation = self.glossary.translate(translation)
+        return translation
+
+    def _prompt(self, has_chinese: bool) -> str:
+        return self.prompt_manager.get_zh_to_en_prompt() if has_chinese else self.prompt_manager.get_prompt()
+
+    def _count_idle_frame(self, dropped: int) -> None:
+        # A frame that sent no request; with segments dropped, the confidence filter may have saved one.
+        self.stats.incr("frames_without_requests")
+        if dropped:
+            self.stats.incr("translations_saved")
+
+    def _recognize(self, token: int, frames: Sequence[CapturedFrame]) -> Dict[str, List[OcrSegment]]:
+        """OCR region frames, re-running the engine only on bands that changed since last time.
+
+        In ``scroll`` mode each region's previous frame is first shifted by the
+        estimated chat scroll, so lines that merely moved up keep their text and only
+        the newly exposed strip is recognised. The slices of all regions go to the
+        engine as one batch. Runs on the OCR executor thread, which owns the
+        previous-frame state.
+        """
+        if token != self._ocr_token:
+            self._ocr_token = token
+            self._region_states = {}
+            self._translation_cache.clear()
+            self._retry_after.clear()
+
+        with self.stats.timed("recognize"):
+            passes = [self._plan_region(frame) for frame in frames]
+            slices = [ocr_slice for region_pass in passes for ocr_slice in region_pass.slices]
+            results = iter(self.ocr.run_batch([(item.image, item.boxes) for item in slices]) if slices else ())
+            self.stats.incr("ocr_batches")
+            self.stats.incr("region_frames", len(passes))
+
+            recognised: Dict[str, List[OcrSegment]] = {}
+            for region_pass in passes:
+                segments = list(region_pass.kept)
+                for ocr_slice in region_pass.slices:
+                    found = _segments_from_result(next(results), ocr_slice.left, ocr_slice.top)
+                    band = ocr_slice.band
+                    found = [segment for segment in found if band is None or band[0] <= segment.center_y < band[1]]
+                    if self._channels is not None:
+                        self._measure_colours(region_pass.frame.pixels, found)
+                    segments.extend(found)
+                if not region_pass.full:
+                    segments.sort(key=lambda segment: (segment.box[1], segment.box[0]))
+                state = self._region_states[region_pass.frame.region]
+                state.rows = region_pass.frame.row_hashes
+                state.segments = segments
+                recognised[region_pass.frame.region] = segments
+        return recognised
+
+    def _measure_colours(self, pixels: np.ndarray, segments: Sequence[OcrSegment]) -> None:
+        height, width = pixels.shape[:2]
+        with self.stats.timed("channel_colour"):
+            for segment in segments:
+                x0, y0, x1, y1 = segment.box
+                crop = pixels[max(int(y0), 0) : min(int(y1) + 1, height), max(int(x0), 0) : min(int(x1) + 1, width)]
+                segment.colour = line_colour(crop) if crop.size else None
+
+    def _plan_region(self, frame: CapturedFrame) -> _RegionPass:
+        """Decide which parts of a region frame need the engine and which segments carry over."""
+        state = self._region_states.get(frame.region)
+        if state is None:
+            state = _RegionState(repeats=RepeatTracker.from_config(self._repeats_cfg))
+            self._region_states[frame.region] = state
+        pixels = frame.pixels
+        height = pixels.shape[0]
+        mode = self._reuse_mode
+        bands: Optional[List[frame_analysis.Band]] = None
+        reusable = state.segments
+        if mode != "off" and frame.dump_path is None and state.rows is not None:
+            reference = state.rows
+            if mode == "scroll":
+                shift = frame_analysis.estimate_scroll(reference, frame.row_hashes)
+                if shift:
+                    self.stats.incr("scroll_hits")
+                    reference = frame_analysis.align_rows(reference, frame.row_hashes, shift)
+                    reusable = [
+                        moved
+                        for moved in (segment.shifted(shift) for segment in reusable)
+                        if moved.box[1] >= 0 and moved.box[3] <= height
+                    ]
+                else:
+                    self.stats.incr("scroll_misses")
+            active = frame_analysis.row_activity(pixels)
+            bands = frame_analysis.dirty_bands(reference, frame.row_hashes, active)
+            if sum(bottom - top for top, bottom in bands) > height * _FULL_PASS_RATIO:
+                bands = None
+
+        self.stats.incr("frame_rows", height)
+        if bands is None:
+            self.stats.incr("full_passes")
+            self.stats.incr("ocr_rows", height)
+            if frame.dump_path:
+                slices = [_OcrSlice(frame.dump_path, None, 0, 0)]
+            else:
+                slices = self._slices_for(pixels)
+            return _RegionPass(frame, [], slices, True)
+
+        kept = [
+            segment
+            for segment in reusable
+            if not any(top <= segment.center_y < bottom for top, bottom in bands)
+        ]
+        slices = []
+        for top, bottom in bands:
+            crop_top = max(top - _BAND_PADDING, 0)
+            crop_bottom = min(bottom + _BAND_PADDING, height)
+            slices.extend(self._slices_for(pixels[crop_top:crop_bottom], crop_top, (top, bottom)))
+            self.stats.incr("ocr_rows", crop_bottom - crop_top)
+        self.stats.incr("band_passes")
+        return _RegionPass(frame, kept, slices, False)
+
+    def _slices_for(
+        self, pixels: np.ndarray, top: int = 0, band: Optional[frame_analysis.Band] = None
+    ) -> List[_OcrSlice]:
+        """Engine input for a BGRA slice whose first row sits at ``top`` in the frame."""
+        image = _engine_input(pixels)
+        left = offset = 0
+        if self._preprocess.get("enabled", False):
+            with self.stats.timed("preprocess"):
+                prepared = frame_analysis.prepare_text_image(
+                    pixels,
+                    contrast=int(self._preprocess.get("contrast", 60)),
+                    binarize=bool(self._preprocess.get("binarize", True)),
+                    margin=int(self._preprocess.get("margin", 4)),
+                )
+            if prepared is None:
+                self.stats.incr("preprocess_empty")
+                return []
+            image, left, offset = prepared
+            saved = pixels.shape[0] * pixels.shape[1] - image.shape[0] * image.shape[1]
+            self.stats.incr("preprocess_pixels_saved", saved)
+        boxes: Optional[List[frame_analysis.Rect]] = None
+        if self._line_mode == "fixed":
+            with self.stats.timed("line_profile"):
+                lines = frame_analysis.text_lines(pixels)
+            if lines is not None:
+                self.stats.incr("fixed_line_passes")
+                if self._channels is not None:
+                    lines = self._unfiltered_lines(pixels, lines)
+                boxes = [
+                    (
+                        max(x0 - left, 0),
+                        max(y0 - offset, 0),
+                        min(x1 - left, image.shape[1]),
+                        min(y1 - offset, image.shape[0]),
+                    )
+                    for x0, y0, x1, y1 in lines
+                ]
+                boxes = [box for box in boxes if box[0] < box[2] and box[1] < box[3]]
+            else:
+                self.stats.incr("fixed_line_fallbacks")
+        return [_OcrSlice(image, boxes, left, top + offset, band)]
+
+    def _unfiltered_lines(self, pixels: np.ndarray, lines: List[frame_analysis.Rect]) -> List[frame_analysis.Rect]:
+        """Drop line boxes whose colour alone shows they belong to filtered-out channels."""
+        kept = []
+        with self.stats.timed("channel_colour"):
+            for x0, y0, x1, y1 in lines:
+                if self._channels.skips_colour(line_colour(pixels[y0:y1, x0:x1])):
+                    continue
+                kept.append((x0, y0, x1, y1))
+        if len(kept) < len(lines):
+            self.stats.incr("channel_lines_skipped", len(lines) - len(kept))
+        return kept
+
+    def _region_monitors(self) -> Dict[str, Optional[dict[str, int]]]:
+        monitors: Dict[str, Optional[dict[str, int]]] = {}
+        if self._capture_rect is not None:
+            monitors[MAIN_REGION] = self._rect_to_monitor(self._capture_rect)
+        for name, rect in self._extra_regions.items():
+            monitors[name] = self._rect_to_monitor(rect)
+        return monitors
+
+    def _load_extra_regions(self) -> Dict[str, QtCore.QRect]:
+        regions: Dict[str, QtCore.QRect] = {}
+        entries = self.cfg.get_ocr_config().get("regions")
+        for entry in entries if isinstance(entries, list) else ():
+            if not isinstance(entry, dict):
+                continue
+            name = str(entry.get("name", "")).strip()
+            if not name or name == MAIN_REGION or name in regions:
+                logger.warning("Ignoring OCR region with missing or duplicate name: %r", entry)
+                continue
             try:
-                Path(path).unlink(missing_ok=True)
-            except Exception:
-                pass
-
-    def _capture(self, rect: QtCore.QRect) -> Optional[str]:
-        monitor = self._rect_to_monitor(rect)
-        if monitor is None:
-            return None
-        location = QtCore.QStandardPaths.writableLocation(QtCore.QStandardPaths.TempLocation)
-        if not location:
-            return None
-        output_dir = Path(location)
-        try:
-            output_dir.mkdir(parents=True, exist_ok=True)
-        except OSError:
-            return None
-        try:
-            with mss.mss() as grabber:
-                shot = grabber.grab(monitor)
-        except mss.exception.ScreenShotError:
-            return None
-        digest = hashlib.sha1(memoryview(shot.rgb)[::32]).hexdigest()
-        if digest == self._last_capture_hash:
-            return None
-        file_path = output_dir / f"wow_translator_{QtCore.QDateTime.currentMSecsSinceEpoch()}.png"
-        tools.to_png(shot.rgb, shot.size, output=str(file_path))
-        self._last_capture_hash = digest
-        return str(file_path)
+                rect = QtCore.QRect(
+                    int(entry.get("x", 0)),
+                    int(entry.get("y", 0)),
+                    int(entry.get("width", 0)),
+                    int(entry.get("height", 0)),
+                )
+            except (TypeError, ValueError):
+                logger.warning("Ignoring OCR region %r with invalid geometry", name)
+                continue
+            if rect.isEmpty():
+                continue
+            regions[name] = rect
+        return regions
 
     def _rect_to_monitor(self, rect: QtCore.QRect) -> Optional[dict[str, int]]:
         if rect.width() <= 0 or rect.height() <= 0:
@@ -0,0 +1,117 @@
+"""Produce dynamically quantized INT8 copies of RapidOCR's detection and recognition models.
+
+    python ocr_quantize.py
+    python ocr_quantize.py --ops MatMul,Conv --weight-type uint8
+
+The models are written to ``models/ocr_int8`` and loaded by pointing
+``ocr.engine.det_model_path`` / ``ocr.engine.rec_model_path`` at them. Compare
+them with the float models before switching:
+
+    python ocr_benchmark.py quantized --image chat1.png
+
+Needs the ``onnx`` package on top of the runtime requirements.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+QUANTIZED_DIR = Path(__file__).resolve().parent / "models" / "ocr_int8"
+# Quantized file name per model, relative to QUANTIZED_DIR.
+QUANTIZED_NAMES: Dict[str, str] = {"det": "det.int8.onnx", "rec": "rec.int8.onnx"}
+
+# The PP-OCR models keep their weights in Constant nodes; they must be folded into
+# initializers (``quant_pre_process``) before any op can be quantized. Only
+# MatMul is quantized by default: ConvInteger has no fast CPU kernel in
+# onnxruntime, and quantized convolutions were both slower and less accurate.
+DEFAULT_OPS = ("MatMul",)
+
+
+def bundled_models() -> Dict[str, Path]:
+    """Float det/rec model paths shipped inside the rapidocr-onnxruntime package."""
+    spec = importlib.util.find_spec("rapidocr_onnxruntime")
+    if spec is None or spec.origin is None:
+        raise SystemExit("rapidocr-onnxruntime is not installed")
+    models = Path(spec.origin).parent / "models"
+    found: Dict[str, Path] = {}
+    for kind in QUANTIZED_NAMES:
+        matches = sorted(models.glob(f"*_{kind}_infer.onnx"))
+        if not matches:
+            raise SystemExit(f"no {kind} model found in {models}")
+        found[kind] = matches[-1]
+    return found
+
+
+def quantize_model(source: Path, target: Path, ops: Sequence[str], weight_type: str) -> Optional[int]:
+    """Write an INT8 copy of ``source`` to ``target``; return the number of quantized nodes.
+
+    Returns None, writing nothing, when the model has none of ``ops``.
+    """
+    try:
+        import onnx
+        from onnxruntime.quantization import QuantType, quant_pre_process, quantize_dynamic
+    except ImportError:
+        raise SystemExit("onnx is not installed: python -m pip install onnx")
+
+    with tempfile.TemporaryDirectory(prefix="wow_translator_quant_") as tmp:
+        folded = Path(tmp) / source.name
+        quant_pre_process(str(source), str(folded), skip_symbolic_shape=True)
+        candidates = [node for node in onnx.load(str(folded)).graph.node if node.op_type in ops]
+        if not candidates:
+            return None
+        target.parent.mkdir(parents=True, exist_ok=True)
+        quantize_dynamic(
+            str(folded),
+            str(target),
+            op_types_to_quantize=list(ops),
+            weight_type=QuantType.QUInt8 if weight_type == "uint8" else QuantType.QInt8,
+        )
+    return len(candidates)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Quantize the RapidOCR models to INT8")
+    parser.add_argument("--det", help="float detection model (default: the one bundled with RapidOCR)")
+    parser.add_argument("--rec", help="float recognition model (default: the one bundled with RapidOCR)")
+    parser.add_argument("--output", default=str(QUANTIZED_DIR), help="directory for the quantized models")
+    parser.add_argument(
+        "--ops", default=",".join(DEFAULT_OPS), help="comma-separated op types to quantize (MatMul, Conv, Gemm)"
+    )
+    parser.add_argument("--weight-type", choices=("uint8", "int8"), default="int8")
+    return parser
+
+
+def main(argv: List[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    ops = [op.strip() for op in args.ops.split(",") if op.strip()]
+    sources = bundled_models()
+    if args.det:
+        sources["det"] = Path(args.det)
+    if args.rec:
+        sources["rec"] = Path(args.rec)
+
+    settings: Dict[str, str] = {}
+    for kind, source in sources.items():
+        target = Path(args.output) / QUANTIZED_NAMES[kind]
+        count = quantize_model(source, target, ops, args.weight_type)
+        if count is None:
+            print(f"{kind}: {source.name} has no {'/'.join(ops)} nodes, keeping the float model")
+            continue
+        size = target.stat().st_size / 1e6
+        print(f"{kind}: {count} nodes quantized, {source.stat().st_size / 1e6:.1f} MB -> {size:.1f} MB: {target}")
+        settings[f"{kind}_model_path"] = str(target)
+
+    if settings:
+        print("\nAdd to ocr.engine in config/settings.json:")
+        print(json.dumps(settings, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
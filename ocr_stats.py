@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator
+
+
+@dataclass
+class _Timing:
+    count: int = 0
+    total: float = 0.0
+    last: float = 0.0
+    peak: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.peak = max(self.peak, seconds)
+
+
+class PipelineStats:
+    """Thread-safe counters and latency timers shared by the OCR pipeline stages."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._timings: Dict[str, _Timing] = {}
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._timings.setdefault(name, _Timing()).add(seconds)
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def counter(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def average_ms(self, name: str) -> float:
+        with self._lock:
+            timing = self._timings.get(name)
+            if not timing or not timing.count:
+                return 0.0
+            return timing.total / timing.count * 1000.0
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            data: Dict[str, float] = {name: float(value) for name, value in self._counters.items()}
+            for name, timing in self._timings.items():
+                if not timing.count:
+                    continue
+                data[f"{name}_count"] = float(timing.count)
+                data[f"{name}_avg_ms"] = timing.total / timing.count * 1000.0
+                data[f"{name}_last_ms"] = timing.last * 1000.0
+                data[f"{name}_max_ms"] = timing.peak * 1000.0
+            return data
+
+    def summary(self) -> str:
+        with self._lock:
+            parts = [f"{name}={value}" for name, value in sorted(self._counters.items())]
+            for name, timing in sorted(self._timings.items()):
+                if timing.count:
+                    avg = timing.total / timing.count * 1000.0
+                    parts.append(f"{name}={avg:.1f}ms avg/{timing.peak * 1000.0:.1f}ms max (n={timing.count})")
+            return ", ".join(parts)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import time
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from glyph_cache import GlyphTable
+from ocr_backends import create_backend
+from ocr_engine import OcrEngine, OcrJob, OcrResult
+from ocr_stats import PipelineStats
+
+logger = logging.getLogger(__name__)
+
+# Shared-memory attachments the worker keeps open before dropping them all; slots
+# are only reallocated when a larger region is selected.
+_MAX_ATTACHMENTS = 8
+
+
+class FrameRing:
+    """Round-robin shared-memory slots that carry BGR images to the worker process.
+
+    A slot is reallocated, under a new name, only when an image does not fit.
+    Owned by the GUI process, which unlinks the slots in ``close``.
+    """
+
+    def __init__(self, slots: int = 2) -> None:
+        self._slots: List[Optional[SharedMemory]] = [None] * max(int(slots), 1)
+        self._next = 0
+
+    def put(self, images: Sequence[np.ndarray]) -> Tuple[str, List[int]]:
+        """Copy ``images`` back to back into the next slot; return its name and their offsets."""
+        total = sum(image.nbytes for image in images)
+        index = self._next
+        self._next = (index + 1) % len(self._slots)
+        shm = self._slots[index]
+        if shm is None or shm.size < total:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            shm = SharedMemory(create=True, size=max(total, 1))
+            self._slots[index] = shm
+        offsets: List[int] = []
+        offset = 0
+        for image in images:
+            view = np.ndarray(image.shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+            view[...] = image
+            del view
+            offsets.append(offset)
+            offset += image.nbytes
+        return shm.name, offsets
+
+    def close(self) -> None:
+        for index, shm in enumerate(self._slots):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+                self._slots[index] = None
+
+
+def _worker_main(
+    conn: Connection,
+    backend: str,
+    options: Dict[str, Any],
+    engine_kwargs: Dict[str, Any],
+    glyph_cfg: Optional[Dict[str, Any]],
+) -> None:
+    """Entry point of the OCR process: build the engine, then serve requests until EOF."""
+    engine = OcrEngine(
+        create_backend(backend, options), glyph_table=GlyphTable.from_config(glyph_cfg), **engine_kwargs
+    )
+    engine.warm_up()
+    conn.send(("ready", None))
+
+    attached: Dict[str, SharedMemory] = {}
+    while True:
+        try:
+            name, specs = conn.recv()
+        except (EOFError, OSError):
+            break
+        try:
+            shm = attached.get(name) if name else None
+            if name and shm is None:
+                if len(attached) >= _MAX_ATTACHMENTS:
+                    for stale in attached.values():
+                        stale.close()
+                    attached.clear()
+                shm = attached[name] = SharedMemory(name=name)
+            jobs = []
+            for source, boxes in specs:
+                if isinstance(source, str):
+                    jobs.append((source, boxes))
+                else:
+                    offset, shape = source
+                    jobs.append((np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset), boxes))
+            result = engine.run_batch(jobs)
+            del jobs
+            conn.send(("ok", result))
+        except Exception as exc:  # reported to the caller, the worker keeps serving
+            conn.send(("error", f"{type(exc).__name__}: {exc}"))
+
+    for shm in attached.values():
+        try:
+            shm.close()
+        except BufferError:  # pragma: no cover - a view outlived its request
+            pass
+    engine.close()
+
+
+class ProcessOcrEngine:
+    """``OcrEngine`` look-alike that runs the engine in a separate process.
+
+    Keeps inference and its Python post-processing off the GUI process's GIL.
+    The images of one batch travel together through a ``FrameRing`` slot; only
+    boxes and text come back. If the
+    worker dies or exceeds ``timeout`` seconds, the current request fails and the
+    next one starts a fresh worker. Call from one thread only.
+    """
+
+    def __init__(
+        self,
+        options: Dict[str, Any],
+        *,
+        backend: str = "rapidocr",
+        line_cache_size: int = 512,
+        retry_below: float = 0.0,
+        retry_scale: float = 2.0,
+        detect_scale: float = 1.0,
+        glyph_cache: Optional[Dict[str, Any]] = None,
+        slots: int = 2,
+        timeout: float = 30.0,
+        stats: Optional[PipelineStats] = None,
+    ) -> None:
+        self._backend = backend
+        self._options = dict(options)
+        self._glyph_cfg = dict(glyph_cache) if glyph_cache else None
+        # Keyword arguments for the worker's ``OcrEngine``.
+        self._engine_kwargs = {
+            "line_cache_size": line_cache_size,
+            "retry_below": retry_below,
+            "retry_scale": retry_scale,
+            "detect_scale": detect_scale,
+        }
+        self._timeout = max(float(timeout), 1.0)
+        self.stats = stats or PipelineStats()
+        self._ring = FrameRing(slots)
+        self._context = multiprocessing.get_context("spawn")
+        self._process: Optional[multiprocessing.process.BaseProcess] = None
+        self._conn: Optional[Connection] = None
+        self._starts = 0
+
+    def warm_up(self) -> None:
+        self._ensure_worker()
+
+    def __call__(self, image: Union[np.ndarray, str, Path]) -> List[OcrResult]:
+        return self.run_batch([(image, None)])[0]
+
+    def recognize_boxes(
+        self, image: np.ndarray, boxes: Sequence[Tuple[int, int, int, int]]
+    ) -> List[OcrResult]:
+        return self.run_batch([(image, boxes)])[0]
+
+    def run_batch(self, jobs: Sequence[OcrJob]) -> List[List[OcrResult]]:
+        arrays: List[np.ndarray] = []
+        for image, _ in jobs:
+            if not isinstance(image, (str, Path)):
+                arrays.append(np.ascontiguousarray(image))
+        name, offsets = self._ring.put(arrays) if arrays else (None, [])
+        placed = iter(zip(offsets, arrays))
+        specs = []
+        for image, boxes in jobs:
+            if isinstance(image, (str, Path)):
+                specs.append((str(image), None if boxes is None else list(boxes)))
+            else:
+                offset, array = next(placed)
+                specs.append(((offset, array.shape), None if boxes is None else list(boxes)))
+        return self._request(name, specs)
+
+    def close(self) -> None:
+        self._stop_worker()
+        self._ring.close()
+
+    def _request(self, name: Optional[str], specs: list) -> List[List[OcrResult]]:
+        conn = self._ensure_worker()
+        with self.stats.timed("worker_request"):
+            try:
+                conn.send((name, specs))
+                if not conn.poll(self._timeout):
+                    raise TimeoutError(f"no reply within {self._timeout:.0f}s")
+                status, payload = conn.recv()
+            except (EOFError, OSError, TimeoutError) as exc:
+                logger.warning("OCR worker failed: %s", exc)
+                self._stop_worker()
+                raise RuntimeError(f"OCR worker failed: {exc}") from exc
+        if status != "ok":
+            raise RuntimeError(payload)
+        return payload
+
+    def _ensure_worker(self) -> Connection:
+        if self._process is not None and self._process.is_alive() and self._conn is not None:
+            return self._conn
+        if self._process is not None:
+            logger.warning("OCR worker exited (code %s)", self._process.exitcode)
+            self._stop_worker()
+        if self._starts:
+            logger.info("Restarting OCR worker")
+            self.stats.incr("worker_restarts")
+        self._starts += 1
+
+        parent, child = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child, self._backend, self._options, self._engine_kwargs, self._glyph_cfg),
+            name="ocr-worker",
+            daemon=True,
+        )
+        started = time.perf_counter()
+        process.start()
+        child.close()
+        self._process, self._conn = process, parent
+        try:
+            # Loading the models takes a while on first start, hence the generous wait.
+            if not parent.poll(max(self._timeout, 120.0)):
+                raise TimeoutError("OCR worker did not start")
+            parent.recv()
+        except (EOFError, OSError, TimeoutError) as exc:
+            self._stop_worker()
+            raise RuntimeError(f"OCR worker failed to start: {exc}") from exc
+        self.stats.record("worker_start", time.perf_counter() - started)
+        return parent
+
+    def _stop_worker(self) -> None:
+        conn, process = self._conn, self._process
+        self._conn = self._process = None
+        if conn is not None:
+            conn.close()
+        if process is not None:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.kill()
+                process.join(timeout=2)
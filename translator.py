@@ -5,7 +5,7 @@ import logging
 import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Sequence
 
 import requests
 
@@ -45,6 +45,8 @@ class QwenTranslator:
     """Simple HTTP client for the Qwen chat completion API."""
 
     endpoint = "https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions"
+    # The model may merge or split lines, so several messages cannot share one request.
+    supports_batch = False
 
     def __init__(self, cfg: QwenConfig) -> None:
         self.cfg = cfg
@@ -109,6 +111,9 @@ class QwenTranslator:
 class LocalOpusTranslator:
     """Local INT8 Marian translator powered by CTranslate2."""
 
+    # translate_batch() decodes one sentence per text in a single model call.
+    supports_batch = True
+
     def __init__(self, cfg: LocalOpusConfig) -> None:
         if ctranslate2 is None or spm is None:
             raise ImportError("LocalOpusTranslator requires 'ctranslate2' and 'sentencepiece'")
@@ -156,28 +161,40 @@ class LocalOpusTranslator:
         ocr_context: str = "",
         glossary_hint: Optional[str] = None,
     ) -> str:
-        content = text.strip()
-        if not content:
-            return ""
+        return self.translate_batch([text], prompt_template, ocr_context, glossary_hint)[0]
 
-        if self._source_prefix and not content.startswith(self._source_prefix):
-            content = f"{self._source_prefix}{content}"
+    def translate_batch(
+        self,
+        texts: Sequence[str],
+        prompt_template: str,
+        ocr_context: str = "",
+        glossary_hint: Optional[str] = None,
+    ) -> List[str]:
+        """Translate each of ``texts`` as its own sentence, all in one model call."""
+        contents = [text.strip() for text in texts]
+        batch: List[List[str]] = []
+        for content in contents:
+            if not content:
+                continue
+            if self._source_prefix and not content.startswith(self._source_prefix):
+                content = f"{self._source_prefix}{content}"
+            batch.append(self._encode(content))
+        if not batch:
+            return ["" for _ in contents]
 
-        tokens = self._encode(content)
         beam_size = max(1, int(self.cfg.beam_size))
         kwargs = {
             "beam_size": beam_size,
-            "target_prefix": self._target_prefix_tokens,
+            "target_prefix": self._target_prefix_tokens * len(batch) if self._target_prefix_tokens else None,
         }
         max_length = int(self.cfg.max_decoding_length)
         if max_length > 0:
             kwargs["max_decoding_length"] = max_length
 
         with self._lock:
-            results = self.translator.translate_batch([tokens], **kwargs)
-
-        if not results:
-            return ""
+            results = list(self.translator.translate_batch(batch, **kwargs))
 
-        hypothesis = results[0].hypotheses[0] if results[0].hypotheses else []
-        return self._decode(hypothesis)
+        decoded = iter(
+            self._decode(result.hypotheses[0]) if result.hypotheses else "" for result in results
+        )
+        return [next(decoded, "") if content else "" for content in contents]
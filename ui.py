@@ -4,6 +4,9 @@ from typing import Optional
 
 from PySide6 import QtCore, QtWidgets, QtGui
 
+# Translation updates arriving within this many milliseconds of a redraw are drawn together.
+RENDER_BUDGET_MS = 50
+
 
 class InputTextEdit(QtWidgets.QPlainTextEdit):
     submitRequested = QtCore.Signal(bool)
@@ -244,7 +247,16 @@ class OcrResizeHandle(QtWidgets.QWidget):
 
 
 class OcrResultWindow(QtWidgets.QWidget):
+    """Translucent window showing the OCR translations.
+
+    ``update_translation`` may be called once per finished message: the first
+    update is drawn at once, later ones within ``RENDER_BUDGET_MS`` are
+    coalesced into one redraw of the newest text. ``translationShown`` fires
+    after each redraw.
+    """
+
     geometryUpdated = QtCore.Signal(QtCore.QRect)
+    translationShown = QtCore.Signal()
 
     def __init__(self, initial_geometry: QtCore.QRect | None = None) -> None:
         super().__init__(None, QtCore.Qt.Window | QtCore.Qt.FramelessWindowHint | QtCore.Qt.Tool)
@@ -255,9 +267,14 @@ class OcrResultWindow(QtWidgets.QWidget):
         self._dragging = False
         self._drag_offset = QtCore.QPoint()
         self._last_translation = ""
+        self._pending_translation: Optional[str] = None
         self._last_status = ""
         self._pass_through = False
         self._suppress_emit = False
+        self._render_timer = QtCore.QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.setInterval(RENDER_BUDGET_MS)
+        self._render_timer.timeout.connect(self._flush_translation)
 
         outer = QtWidgets.QVBoxLayout(self)
         outer.setContentsMargins(0, 0, 0, 0)
@@ -327,9 +344,20 @@ class OcrResultWindow(QtWidgets.QWidget):
         self._suppress_emit = False
 
     def update_translation(self, text: str) -> None:
+        self._pending_translation = text
+        if not self._render_timer.isActive():
+            self._flush_translation()
+
+    def _flush_translation(self) -> None:
+        text = self._pending_translation
+        self._pending_translation = None
+        if text is None or text == self._last_translation:
+            return
         self._last_translation = text
-        self.translationView.clear()
         self.translationView.setPlainText(text)
+        # Updates arriving within the budget wait for the timer and are drawn together.
+        self._render_timer.start()
+        self.translationShown.emit()
 
     def update_status(self, text: str) -> None:
         self._last_status = text